@@ -72,5 +72,30 @@ def create_app(config_class=Config):
         except Exception:
             # Avoid crashing the app if introspection/DDL fails; continue startup
             db.session.rollback()
-    
+        
+        # Ensure the options_hash columns used to skip unchanged Tally option syncs exist
+        try:
+            inspector = inspect(db.engine)
+            for table_name in ('template_fields', 'sub_template_fields'):
+                if inspector.has_table(table_name):
+                    columns = {col['name'] for col in inspector.get_columns(table_name)}
+                    if 'options_hash' not in columns:
+                        db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN options_hash VARCHAR(32)'))
+                        db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+        # create_all doesn't add new indexes to existing tables; create the option table ones
+        # declared on the models that are missing
+        from .models import FieldOption, SubTemplateFieldOption
+        inspector = inspect(db.engine)
+        for table in (FieldOption.__table__, SubTemplateFieldOption.__table__):
+            existing_indexes = {idx['name'] for idx in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    try:
+                        index.create(db.engine)
+                    except Exception:
+                        app.logger.warning('Could not create index %s on %s', index.name, table.name, exc_info=True)
+
     return app 
\ No newline at end of file
@@ -1,7 +1,7 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app
 from .. import db
 from ..models import OCRData, OCRLineItem, OCRLineItemValue, Document, TemplateField, SubTemplateField, Template, FieldOption, SubTemplateFieldOption
-from ..utils.gemini_ocr import call_gemini_ocr, parse_gemini_response
+from ..utils.gemini_ocr import call_gemini_batch, call_gemini_ocr, get_gemini_client, parse_gemini_response
 from ..utils.enums import DocumentStatus, FieldType, DataType
 from ..utils.data_conversion import (
     safe_convert_template_field_value, 
@@ -21,14 +21,33 @@ from ..tally import (
     load_stock_items_as_sub_field_options,
     load_ledgers_as_sub_field_options,
     auto_load_tally_sub_field_options,
+    invalidate_tally_cache,
     TallyFieldOptionsError
 )
 import os
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
+import orjson
+from rapidfuzz import fuzz, process, utils as fuzz_utils
 import json
 
-def map_select_field_value(ocr_value, field_options, field_name):
+def processed_option_labels(field_options):
+    """
+    Case/punctuation-fold option labels for map_select_field_value.
+    
+    Compute this once and pass it along when mapping many values (e.g. every row of a
+    table) against the same options, instead of folding every label on each call.
+    
+    Returns:
+        tuple: (folded labels in option order, {folded label: index of its first option},
+        leaving out labels that fold to nothing, such as "-")
+    """
+    labels = [fuzz_utils.default_process(option.option_label) for option in field_options]
+    exact_index = {}
+    for index, label in enumerate(labels):
+        if label:
+            exact_index.setdefault(label, index)
+    return labels, exact_index
+
+def map_select_field_value(ocr_value, field_options, field_name, processed_labels=None):
     """
     Map OCR extracted value to field options using fuzzy matching and LLM confirmation.
     
@@ -36,6 +55,7 @@ def map_select_field_value(ocr_value, field_options, field_name):
         ocr_value: The raw OCR extracted value
         field_options: List of FieldOption objects for the field
         field_name: Name of the field for context
+        processed_labels: Optional processed_option_labels(field_options), reused across calls
         
     Returns:
         str: Final mapped value or None if no match found
@@ -46,19 +66,41 @@ def map_select_field_value(ocr_value, field_options, field_name):
     if not field_options:
         return ocr_value  # No options configured, return original
     
-    # Extract option labels for matching
-    option_labels = [option.option_label for option in field_options]
-    option_values = [option.option_value for option in field_options]
-    
-    # Get top 5 fuzzy matches based on option labels
-    fuzzy_matches = process.extractBests(
-        ocr_value, 
-        option_labels, 
-        scorer=fuzz.WRatio,  # Use weighted ratio for better matching
-        score_cutoff=75,     # Increased minimum similarity score
-        limit=5              # Top 5 matches
-    )
     from flask import current_app
+    
+    if processed_labels is None:
+        processed_labels = processed_option_labels(field_options)
+    labels, exact_index = processed_labels
+    query = fuzz_utils.default_process(ocr_value)
+    if not query:
+        # Only whitespace/punctuation (e.g. " " or "!!!"): nothing to match, as with fuzzywuzzy
+        current_app.logger.info(f"SELECT field mapping - NO MATCHES: '{ocr_value}' for field '{field_name}' (no letters or digits)")
+        return None
+    
+    # An exact folded match is the only way to score 100 and would be the top fuzzy match
+    # anyway, so return it without scoring every option
+    index = exact_index.get(query)
+    if index is not None:
+        matching_option = field_options[index]
+        current_app.logger.info(f"SELECT field mapping - AUTO-MATCH: '{ocr_value}' -> '{matching_option.option_value}' (100% confidence) for field '{field_name}'")
+        return matching_option.option_value
+    
+    # Get top 5 fuzzy matches based on option labels as (label, score, option index).
+    # Labels are case/punctuation-folded before scoring, and scores rounded to whole
+    # percents before the 75% cutoff is applied, as fuzzywuzzy did (so a raw 74.5,
+    # which rounds half-to-even to 74, is rejected)
+    fuzzy_matches = [
+        (label, round(score), index)
+        for label, score, index in process.extract(
+            query,
+            labels,
+            scorer=fuzz.WRatio,  # Use weighted ratio for better matching
+            processor=None,      # Query and labels are already folded
+            score_cutoff=74.5,   # Lowest raw score that can round to 75
+            limit=5              # Top 5 matches
+        )
+    ]
+    fuzzy_matches = [match for match in fuzzy_matches if match[1] >= 75]  # Increased minimum similarity score
 
     # If no decent matches found, return None (no mapping found)
     if not fuzzy_matches:
@@ -67,25 +109,22 @@ def map_select_field_value(ocr_value, field_options, field_name):
         return None
     
     # Check for high confidence match (90%+) - auto-match without LLM
-    best_match, best_score = fuzzy_matches[0]
+    best_match, best_score, best_index = fuzzy_matches[0]
     if best_score >= 90:
-        # Find corresponding option value and return directly
-        matching_option = next((opt for opt in field_options if opt.option_label == best_match), None)
-        if matching_option:
-            current_app.logger.info(f"SELECT field mapping - AUTO-MATCH: '{ocr_value}' -> '{matching_option.option_value}' ({best_score}% confidence) for field '{field_name}'")
-            return matching_option.option_value
+        # Return the matched option's value directly
+        matching_option = field_options[best_index]
+        current_app.logger.info(f"SELECT field mapping - AUTO-MATCH: '{ocr_value}' -> '{matching_option.option_value}' ({best_score}% confidence) for field '{field_name}'")
+        return matching_option.option_value
     
     # Build LLM prompt for final selection
     match_options = []
-    for match, score in fuzzy_matches:
-        # Find corresponding option value
-        matching_option = next((opt for opt in field_options if opt.option_label == match), None)
-        if matching_option:
-            match_options.append({
-                'value': matching_option.option_value,
-                'label': matching_option.option_label,
-                'similarity_score': score
-            })
+    for match, score, index in fuzzy_matches:
+        matching_option = field_options[index]
+        match_options.append({
+            'value': matching_option.option_value,
+            'label': matching_option.option_label,
+            'similarity_score': score
+        })
     
     # Create LLM prompt for final selection
     llm_prompt = f"""
@@ -113,8 +152,6 @@ Response (return only the option value or "NONE"):
     
     try:
         # Call Gemini for final selection - text only
-        from google import genai
-        
         # Get API key
         api_key = current_app.config.get('GEMINI_API_KEY')
         if not api_key:
@@ -124,8 +161,8 @@ Response (return only the option value or "NONE"):
                 return match_options[0]['value']
             return None
         
-        # Configure Gemini client
-        client = genai.Client(api_key=api_key)
+        # Shared Gemini client (reuses its connection pool across calls)
+        client = get_gemini_client(api_key)
         
         # Log the mapping attempt
         current_app.logger.info(f"SELECT field mapping - LLM EVALUATION: '{ocr_value}' for field '{field_name}' with {len(match_options)} candidate options (best fuzzy score: {best_score}%)")
@@ -526,15 +563,34 @@ def process_document_internal(doc_id, template_id):
         # Separate fields by type
         text_fields = [f for f in template_fields if f.field_type in [FieldType.TEXT, FieldType.SELECT, FieldType.NUMBER, FieldType.DATE, FieldType.EMAIL, FieldType.CURRENCY]]
         table_fields = [f for f in template_fields if f.field_type == FieldType.TABLE]
-        # 7. Process text-based fields
+        
+        # The text-field prompt and each table prompt are independent Gemini calls,
+        # so build them all up front and run them concurrently
+        ocr_requests = []
         if text_fields:
             # Build enhanced prompt with hierarchical AI instructions
             enhanced_prompt = build_comprehensive_text_prompt(template, text_fields)
             print("Enhanced prompt for text fields:", enhanced_prompt)
             field_names = [f.field_name.value for f in text_fields]
-            
-            # Call Gemini OCR with enhanced prompt
-            gemini_response = call_gemini_ocr(doc.file_path, field_names, custom_prompt=enhanced_prompt)
+            ocr_requests.append((doc.file_path, field_names, enhanced_prompt, False))
+        
+        table_sub_fields = {}
+        for table_field in table_fields:
+            # Get sub-template fields for this table
+            sub_fields = SubTemplateField.query.filter_by(field_id=table_field.field_id).all()
+            table_sub_fields[table_field.field_id] = sub_fields
+            if sub_fields:
+                sub_field_names = [sf.field_name.value for sf in sub_fields]
+                
+                # Create enhanced table prompt with hierarchical AI instructions
+                enhanced_table_prompt = build_comprehensive_table_prompt(template, table_field, sub_fields)
+                ocr_requests.append((doc.file_path, sub_field_names, enhanced_table_prompt, True))
+        
+        ocr_responses = iter(call_gemini_batch(ocr_requests))
+        
+        # 7. Process text-based fields
+        if text_fields:
+            gemini_response = next(ocr_responses)
             print("Gemini response for text fields:", gemini_response)
             extracted_fields = parse_gemini_response(gemini_response, field_names)
             # print("extracted fields {extracted_fields}")
@@ -597,14 +653,10 @@ def process_document_internal(doc_id, template_id):
 
         # 8. Process table fields
         for table_field in table_fields:
-            # Get sub-template fields for this table
-            sub_fields = SubTemplateField.query.filter_by(field_id=table_field.field_id).all()
+            sub_fields = table_sub_fields[table_field.field_id]
             if sub_fields:
                 sub_field_names = [sf.field_name.value for sf in sub_fields]
-                
-                # Create enhanced table prompt with hierarchical AI instructions
-                enhanced_table_prompt = build_comprehensive_table_prompt(template, table_field, sub_fields)
-                table_response = call_gemini_ocr(doc.file_path, sub_field_names, custom_prompt=enhanced_table_prompt)
+                table_response = next(ocr_responses)
                 table_data = parse_gemini_response(table_response, sub_field_names)
                 
                 # Check for parsing errors
@@ -621,6 +673,10 @@ def process_document_internal(doc_id, template_id):
                         'rows': []
                     }
                     
+                    # SELECT sub-field options and their folded labels, loaded once per table
+                    # rather than once per row: {sub_temp_field_id: (options, processed labels)}
+                    sub_field_choices = {}
+                    
                     # Store in database and create mapped response data
                     for row_index, row_data in enumerate(table_data['rows']):
                         # Create line item
@@ -653,13 +709,18 @@ def process_document_internal(doc_id, template_id):
                                 
                                 if sub_field.data_type == DataType.SELECT:
                                     # Get sub-field options for SELECT sub-fields
-                                    sub_field_options = SubTemplateFieldOption.query.filter_by(sub_temp_field_id=sub_field.sub_temp_field_id).all()
+                                    choices = sub_field_choices.get(sub_field.sub_temp_field_id)
+                                    if choices is None:
+                                        options = SubTemplateFieldOption.query.filter_by(sub_temp_field_id=sub_field.sub_temp_field_id).all()
+                                        choices = sub_field_choices[sub_field.sub_temp_field_id] = (options, processed_option_labels(options))
+                                    sub_field_options, processed_labels = choices
                                     if sub_field_options:
                                         # Use fuzzy matching + LLM to map the value
                                         mapped_value = map_select_field_value(
                                             str(converted_value), 
                                             sub_field_options, 
-                                            sub_field.field_name.value
+                                            sub_field.field_name.value,
+                                            processed_labels
                                         )
                                         if mapped_value is not None:
                                             final_value = mapped_value
@@ -802,14 +863,21 @@ def load_field_tally_options(field_id):
 
 @bp.route('/field/<int:field_id>/options', methods=['GET'])
 def get_field_options(field_id):
-    """Get current options summary for a field"""
+    """
+    Get current options summary for a field
+    
+    Query Parameters:
+        include_options: 'false' to return only the count and last-updated time
+    """
     try:
-        summary = get_field_options_summary(field_id)
+        include_options = request.args.get('include_options', 'true').lower() == 'true'
+        summary = get_field_options_summary(field_id, include_options=include_options)
         
         if 'error' in summary:
             return jsonify(summary), 404
-            
-        return jsonify(summary)
+        
+        # Option lists can hold thousands of rows; orjson serialises them much faster than stdlib json
+        return Response(orjson.dumps(summary), mimetype='application/json')
         
     except Exception as e:
         current_app.logger.error(f"Error getting field options for field {field_id}: {e}")
@@ -819,6 +887,8 @@ def get_field_options(field_id):
 def refresh_field_tally_options(field_id):
     """Refresh field options by reloading from Tally"""
     try:
+        # An explicit refresh should always see current Tally data
+        invalidate_tally_cache()
         result = refresh_field_options(field_id)
         return jsonify(result)
         
@@ -28,6 +28,9 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Collapses runs of whitespace (including OCR non-breaking spaces) in item descriptions
+_WHITESPACE_RE = re.compile(r'\s+')
+
 bp = Blueprint('tally', __name__, url_prefix='/api/tally')
 
 def get_document_ocr_data(document_id):
@@ -154,7 +157,7 @@ def convert_ocr_to_tally_format(ocr_data):
             for row in item_table['rows']:
                 try:
                     # Extract item details from row
-                    item_description = re.sub(r'\s+', ' ', row.get('item_description', '').strip())
+                    item_description = _WHITESPACE_RE.sub(' ', row.get('item_description', '').strip())
 
                     if not item_description:
                         continue
@@ -618,13 +621,15 @@ def test_connection():
 def get_companies():
     """Get list of companies from Tally."""
     try:
+        # Release the Tally connection before serialising the response
         with TallyConnector(version="latest") as tally:
             companies = get_companies_list(tally)
-            return jsonify({
-                'success': True,
-                'companies': companies,
-                'count': len(companies)
-            })
+        
+        return jsonify({
+            'success': True,
+            'companies': companies,
+            'count': len(companies)
+        })
             
     except Exception as e:
         logger.error(f"Failed to get companies: {e}")
@@ -638,13 +643,15 @@ def get_companies():
 def get_ledgers():
     """Get list of ledgers from Tally."""
     try:
+        # Release the Tally connection before serialising the response
         with TallyConnector(version="latest") as tally:
             ledgers = get_ledgers_list(tally)
-            return jsonify({
-                'success': True,
-                'ledgers': ledgers,
-                'count': len(ledgers)
-            })
+        
+        return jsonify({
+            'success': True,
+            'ledgers': ledgers,
+            'count': len(ledgers)
+        })
             
     except Exception as e:
         logger.error(f"Failed to get ledgers: {e}")
@@ -658,13 +665,15 @@ def get_ledgers():
 def get_stock_items():
     """Get list of stock items from Tally."""
     try:
+        # Release the Tally connection before serialising the response
         with TallyConnector(version="latest") as tally:
             stock_items = get_stock_items_list(tally)
-            return jsonify({
-                'success': True,
-                'stock_items': stock_items,
-                'count': len(stock_items)
-            })
+        
+        return jsonify({
+            'success': True,
+            'stock_items': stock_items,
+            'count': len(stock_items)
+        })
             
     except Exception as e:
         logger.error(f"Failed to get stock items: {e}")
@@ -940,13 +949,15 @@ def ensure_party_ledger():
 def get_units():
     """Get list of units of measure from Tally."""
     try:
+        # Release the Tally connection before serialising the response
         with TallyConnector(version="legacy") as tally:
             units = get_units_list(tally)
-            return jsonify({
-                'success': True,
-                'units': units,
-                'count': len(units)
-            })
+        
+        return jsonify({
+            'success': True,
+            'units': units,
+            'count': len(units)
+        })
             
     except Exception as e:
         logger.error(f"Failed to get units: {e}")
@@ -3,7 +3,7 @@ from flask import current_app
 from .. import db
 from ..models import Template, TemplateField, SubTemplateField, FieldOption, SubTemplateFieldOption
 from ..utils.enums import FieldType, FieldName, DataType
-from ..tally import auto_load_tally_options, auto_load_tally_sub_field_options, TallyFieldOptionsError, refresh_field_options
+from ..tally import auto_load_tally_options, auto_load_tally_sub_field_options, bulk_refresh, TallyFieldOptionsError
 
 bp = Blueprint('templates', __name__, url_prefix='/api/templates')
 
@@ -23,31 +23,39 @@ def get_template(template_id):
     template_fields = TemplateField.query.filter_by(template_id=template_id).all()
 
     select_fields = [f for f in template_fields if f.field_type == FieldType.SELECT]
-    for select_field in select_fields:
+    
+    # Also refresh SELECT sub-fields in table fields
+    table_field_ids = [f.field_id for f in template_fields if f.field_type == FieldType.TABLE]
+    select_sub_fields = SubTemplateField.query.filter(
+        SubTemplateField.field_id.in_(table_field_ids),
+        SubTemplateField.data_type == DataType.SELECT
+    ).all() if table_field_ids else []
+    
+    if select_fields or select_sub_fields:
         try:
-            refresh_result = refresh_field_options(select_field.field_id)
-            print(f"Refreshed {refresh_result.get('options_count', 0)} options for field '{select_field.field_name.value}'")
+            # Refresh fields and sub-fields together: each Tally list is fetched once and committed once
+            refresh_results = bulk_refresh(
+                [f.field_id for f in select_fields],
+                [sf.sub_temp_field_id for sf in select_sub_fields]
+            )
+            for select_field in select_fields:
+                refresh_result = refresh_results['fields'][select_field.field_id]
+                if refresh_result.get('success'):
+                    print(f"Refreshed {refresh_result.get('options_count', 0)} options for field '{select_field.field_name.value}'")
+                else:
+                    print(f"Warning: Failed to refresh options for field '{select_field.field_name.value}': {refresh_result.get('error')}")
+            for select_sub_field in select_sub_fields:
+                refresh_result = refresh_results['sub_fields'][select_sub_field.sub_temp_field_id]
+                if refresh_result.get('success'):
+                    print(f"Refreshed {refresh_result.get('options_count', 0)} options for sub-field '{select_sub_field.field_name.value}'")
+                else:
+                    print(f"Warning: Failed to refresh options for sub-field '{select_sub_field.field_name.value}': {refresh_result.get('error')}")
         except TallyFieldOptionsError as e:
-            print(f"Warning: Failed to refresh options for field '{select_field.field_name.value}': {e}")
+            print(f"Warning: Failed to refresh options for template {template_id}: {e}")
             # Continue processing even if refresh fails
         except Exception as e:
-            print(f"Warning: Unexpected error refreshing field '{select_field.field_name.value}': {e}")
+            print(f"Warning: Unexpected error refreshing options for template {template_id}: {e}")
             # Continue processing even if refresh fails
-    
-    # Also refresh SELECT sub-fields in table fields
-    table_fields_for_refresh = [f for f in template_fields if f.field_type == FieldType.TABLE]
-    for table_field in table_fields_for_refresh:
-        sub_fields = SubTemplateField.query.filter_by(field_id=table_field.field_id).all()
-        select_sub_fields = [sf for sf in sub_fields if sf.data_type == DataType.SELECT]
-        for select_sub_field in select_sub_fields:
-            try:
-                # Use the sub-field auto-load function
-                refresh_result = auto_load_tally_sub_field_options(select_sub_field.sub_temp_field_id)
-                print(f"Refreshed {refresh_result.get('options_count', 0)} options for sub-field '{select_sub_field.field_name.value}'")
-            except TallyFieldOptionsError as e:
-                print(f"Warning: Failed to refresh options for sub-field '{select_sub_field.field_name.value}': {e}")
-            except Exception as e:
-                print(f"Warning: Unexpected error refreshing sub-field '{select_sub_field.field_name.value}': {e}")
 
     template = Template.query.get_or_404(template_id)
     return jsonify(template.to_dict())
@@ -262,6 +270,8 @@ def create_field_option(field_id):
     )
     
     db.session.add(option)
+    # Options no longer match the last Tally sync, so the next refresh must resync
+    field.options_hash = None
     db.session.commit()
     
     return jsonify(option.to_dict()), 201 
@@ -298,6 +308,8 @@ def create_sub_field_option(sub_field_id):
     )
     
     db.session.add(option)
+    # Options no longer match the last Tally sync, so the next refresh must resync
+    sub_field.options_hash = None
     db.session.commit()
     
     return jsonify(option.to_dict()), 201
@@ -306,6 +318,7 @@ def create_sub_field_option(sub_field_id):
 def delete_sub_field_option(option_id):
     """Delete a sub-template field option"""
     option = SubTemplateFieldOption.query.get_or_404(option_id)
+    option.sub_template_field.options_hash = None
     db.session.delete(option)
     db.session.commit()
     return jsonify({'message': 'Sub-field option deleted successfully'})
\ No newline at end of file
@@ -5,14 +5,31 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+def engine_options_for(database_uri):
+    """
+    Driver-specific engine options that enable fast executemany, which the bulk
+    option inserts/updates in app.tally.tally_field_options rely on.
+    SQLite needs nothing extra (sqlite3 executemany is already in-process).
+    """
+    if database_uri.startswith(('postgresql://', 'postgresql+psycopg2://')):
+        return {'executemany_mode': 'values_plus_batch', 'insertmanyvalues_page_size': 5000}
+    if database_uri.startswith('mssql+pyodbc://'):
+        return {'fast_executemany': True}
+    return {}
+
+
 class Config:
     # Base directory
     BASE_DIR = Path(__file__).parent.parent
     
-    # SQLite database configuration
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{BASE_DIR}/ocr_platform.db"
+    # Database configuration (SQLite unless overridden)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI') or f"sqlite:///{BASE_DIR}/ocr_platform.db"
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_for(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Raise on lazy relationship loads in the Tally field-option lookups (catches N+1 regressions)
+    RAISELOAD_DEV = os.environ.get('RAISELOAD_DEV', 'false').lower() == 'true'
+    
     # Secret key for sessions
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
@@ -28,6 +45,7 @@ class Config:
     
     # OCR configuration
     DEFAULT_OCR_CONFIDENCE = 0.8
+    # Retries of a rate-limited (429) or 5xx Gemini call, with exponential backoff
     MAX_RETRY_ATTEMPTS = 3
     
     # Gemini API configuration
@@ -3,6 +3,12 @@ from .. import db
 
 class FieldOption(db.Model):
     __tablename__ = 'field_options'
+    __table_args__ = (
+        # Option sync looks rows up per owner and relabels them by value
+        db.Index('ix_field_options_field_id_option_value', 'field_id', 'option_value'),
+        # Lets the options summary read MAX(updated_at) per field from the index
+        db.Index('ix_field_options_field_id_updated_at', 'field_id', 'updated_at'),
+    )
     
     options_id = db.Column(db.Integer, primary_key=True)
     field_id = db.Column(db.Integer, db.ForeignKey('template_fields.field_id'), nullable=False)
@@ -10,6 +10,8 @@ class SubTemplateField(db.Model):
     field_name = db.Column(db.Enum(FieldName), nullable=False)
     data_type = db.Column(db.Enum(DataType), nullable=False)
     ai_instructions = db.Column(db.Text)
+    # Digest of the option list last synced from Tally; cleared when options are edited by hand
+    options_hash = db.Column(db.String(32))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -3,6 +3,10 @@ from .. import db
 
 class SubTemplateFieldOption(db.Model):
     __tablename__ = 'sub_template_field_options'
+    __table_args__ = (
+        # Option sync looks rows up per owner and relabels them by value
+        db.Index('ix_sub_template_field_options_sub_temp_field_id_option_value', 'sub_temp_field_id', 'option_value'),
+    )
     
     sub_options_id = db.Column(db.Integer, primary_key=True)
     sub_temp_field_id = db.Column(db.Integer, db.ForeignKey('sub_template_fields.sub_temp_field_id'), nullable=False)
@@ -11,6 +11,8 @@ class TemplateField(db.Model):
     field_order = db.Column(db.Integer, nullable=False)
     field_type = db.Column(db.Enum(FieldType), nullable=False)
     ai_instructions = db.Column(db.Text)
+    # Digest of the option list last synced from Tally; cleared when options are edited by hand
+    options_hash = db.Column(db.String(32))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -19,6 +19,10 @@ from .data_retrieval import (
     get_ledgers_list,
     get_stock_items_list,
     get_units_list,
+    iter_companies,
+    iter_ledgers,
+    iter_stock_items,
+    iter_units,
     get_vouchers_list,
     find_ledger_by_name,
     find_stock_item_by_name,
@@ -48,8 +52,10 @@ from .tally_field_options import (
     load_stock_items_as_options,
     load_units_as_options,
     auto_load_tally_options,
+    auto_load_tally_options_for_fields,
     refresh_field_options,
     get_field_options_summary,
+    get_field_options_summaries,
     load_customer_options,
     load_vendor_options,
     load_all_ledger_options,
@@ -57,6 +63,9 @@ from .tally_field_options import (
     load_ledgers_as_sub_field_options,
     load_units_as_sub_field_options,
     auto_load_tally_sub_field_options,
+    auto_load_tally_sub_field_options_for_fields,
+    bulk_refresh,
+    invalidate_tally_cache,
     TallyFieldOptionsError
 )
 
@@ -68,6 +77,10 @@ __all__ = [
     'get_ledgers_list', 
     'get_stock_items_list',
     'get_units_list',
+    'iter_companies',
+    'iter_ledgers',
+    'iter_stock_items',
+    'iter_units',
     'get_vouchers_list',
     'find_ledger_by_name',
     'find_stock_item_by_name',
@@ -94,8 +107,10 @@ __all__ = [
     'load_stock_items_as_options',
     'load_units_as_options',
     'auto_load_tally_options',
+    'auto_load_tally_options_for_fields',
     'refresh_field_options',
     'get_field_options_summary',
+    'get_field_options_summaries',
     'load_customer_options',
     'load_vendor_options',
     'load_all_ledger_options',
@@ -104,5 +119,8 @@ __all__ = [
     'load_ledgers_as_sub_field_options',
     'load_units_as_sub_field_options', 
     'auto_load_tally_sub_field_options',
+    'auto_load_tally_sub_field_options_for_fields',
+    'bulk_refresh',
+    'invalidate_tally_cache',
     'TallyFieldOptionsError'
 ]
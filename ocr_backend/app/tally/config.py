@@ -69,6 +69,14 @@ class TallyConfig:
     # Voucher defaults
     DEFAULT_VOUCHER_VIEW = "Invoice Voucher View"
     
+    # Seconds a fetched company/ledger/stock item/unit list is reused for field options;
+    # masters change rarely and the refresh endpoint clears the cache explicitly
+    OPTIONS_CACHE_TTL = int(os.environ.get("TALLY_OPTIONS_CACHE_TTL", "300"))
+    
+    # Rows per bulk INSERT / DELETE page when storing field options; bounds the
+    # per-statement parameter list and memory for very large ledger/stock lists
+    OPTIONS_PAGE_SIZE = max(1, int(os.environ.get("TALLY_OPTIONS_PAGE_SIZE", "5000")))
+    
     @classmethod
     def get_lib_dir(cls, version: str = None) -> str:
         """Get the appropriate library directory based on version."""
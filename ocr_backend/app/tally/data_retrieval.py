@@ -6,7 +6,7 @@ Implements all the data retrieval requirements from the spec.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from webbrowser import get
 
 from .connector import TallyConnector, TallyConnectorError
@@ -14,63 +14,86 @@ from .connector import TallyConnector, TallyConnectorError
 logger = logging.getLogger(__name__)
 
 
-def get_companies_list(connector: TallyConnector) -> List[Dict]:
+def iter_companies(connector: TallyConnector, active_only: bool = False) -> Iterator[Dict]:
     """
-    Retrieve the list of all companies.
+    Yield company dictionaries one at a time while walking the Tally collection.
+    
+    Takes the same arguments as get_companies_list, which materialises this generator.
     
-    Args:
-        connector: Active TallyConnector instance
-        
-    Returns:
-        List of company dictionaries with Name and other properties
-        
     Raises:
         TallyConnectorError: If retrieval fails
     """
     try:
         companies = connector.session.get_companies()
-        result = []
         
         for company in companies:
+            is_active = getattr(company, 'IsActive', True)
+            if active_only and not is_active:
+                continue
+            
             company_dict = {
                 'name': getattr(company, 'Name', ''),
                 'guid': getattr(company, 'GUID', ''),
                 'alias': getattr(company, 'Alias', ''),
-                'is_active': getattr(company, 'IsActive', True)
+                'is_active': is_active
             }
-            result.append(company_dict)
-        
-        logger.info(f"Retrieved {len(result)} companies")
-        return result
+            yield company_dict
         
     except Exception as e:
         logger.error(f"Failed to retrieve companies: {e}")
         raise TallyConnectorError(f"Companies retrieval failed: {e}")
 
 
-def get_ledgers_list(connector: TallyConnector, company_name: Optional[str] = None) -> List[Dict]:
+def get_companies_list(connector: TallyConnector, active_only: bool = False) -> List[Dict]:
     """
-    Fetch all ledgers to match customer or supplier names from OCR data.
+    Retrieve the list of all companies.
     
     Args:
         connector: Active TallyConnector instance
-        company_name: Optional company name filter
+        active_only: Skip inactive companies while building the list
         
     Returns:
-        List of ledger dictionaries
+        List of company dictionaries with Name and other properties
         
+    Raises:
+        TallyConnectorError: If retrieval fails
+    """
+    result = list(iter_companies(connector, active_only))
+    logger.info(f"Retrieved {len(result)} companies")
+    return result
+
+
+def iter_ledgers(
+    connector: TallyConnector,
+    company_name: Optional[str] = None,
+    active_only: bool = False,
+    group: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Yield ledger dictionaries one at a time while walking the Tally collection.
+    
+    Takes the same arguments as get_ledgers_list, which materialises this generator.
+    
     Raises:
         TallyConnectorError: If retrieval fails
     """
     try:
         ledgers = connector.session.get_ledgers()
-        result = []
+        target_group = group.lower() if group else None
         
         for ledger in ledgers:
+            # Apply filters before converting the rest of the .NET object
+            is_active = getattr(ledger, 'IsActive', True)
+            if active_only and not is_active:
+                continue
+            
+            ledger_group = getattr(ledger, 'Group', '') or ''
+            if target_group is not None and ledger_group.lower() != target_group:
+                continue
+            
             # Handle None values from Tally data
             name = getattr(ledger, 'Name', '') or ''
             alias = getattr(ledger, 'Alias', '') or ''
-            group = getattr(ledger, 'Group', '') or ''
             email = getattr(ledger, 'Email', '') or ''
             mobile = getattr(ledger, 'Mobile', '') or ''
             address = getattr(ledger, 'Address', '') or ''
@@ -79,64 +102,119 @@ def get_ledgers_list(connector: TallyConnector, company_name: Optional[str] = No
             ledger_dict = {
                 'name': name,
                 'alias': alias,
-                'group': group,
+                'group': ledger_group,
                 'opening_balance': getattr(ledger, 'OpeningBalance', 0),
-                'is_active': getattr(ledger, 'IsActive', True),
+                'is_active': is_active,
                 'email': email,
                 'mobile': mobile,
                 'address': address,
                 'guid': guid
             }
-            result.append(ledger_dict)
-        
-        logger.info(f"Retrieved {len(result)} ledgers")
-        return result
+            yield ledger_dict
         
     except Exception as e:
         logger.error(f"Failed to retrieve ledgers: {e}")
         raise TallyConnectorError(f"Ledgers retrieval failed: {e}")
 
 
-def get_stock_items_list(connector: TallyConnector, company_name: Optional[str] = None) -> List[Dict]:
+def get_ledgers_list(
+    connector: TallyConnector,
+    company_name: Optional[str] = None,
+    active_only: bool = False,
+    group: Optional[str] = None
+) -> List[Dict]:
     """
-    Retrieve the list of all inventory items to ensure products from OCR data exist in Tally.
+    Fetch all ledgers to match customer or supplier names from OCR data.
     
     Args:
         connector: Active TallyConnector instance
         company_name: Optional company name filter
+        active_only: Skip inactive ledgers while building the list
+        group: Optional ledger group to keep (case-insensitive, e.g. "Sundry Creditors")
         
     Returns:
-        List of stock item dictionaries
+        List of ledger dictionaries
         
+    Raises:
+        TallyConnectorError: If retrieval fails
+    """
+    result = list(iter_ledgers(connector, company_name, active_only, group))
+    logger.info(f"Retrieved {len(result)} ledgers")
+    return result
+
+
+def iter_stock_items(
+    connector: TallyConnector,
+    company_name: Optional[str] = None,
+    active_only: bool = False,
+    stock_group: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Yield stock item dictionaries one at a time while walking the Tally collection.
+    
+    Takes the same arguments as get_stock_items_list, which materialises this generator.
+    
     Raises:
         TallyConnectorError: If retrieval fails
     """
     try:
         stock_items = connector.session.get_stock_items()
-        result = []
+        target_group = stock_group.lower() if stock_group else None
         
         for item in stock_items:
+            # Apply filters before converting the rest of the .NET object
+            is_active = getattr(item, 'IsActive', True)
+            if active_only and not is_active:
+                continue
+            
+            item_stock_group = getattr(item, 'StockGroup', '')
+            if target_group is not None and (item_stock_group or '').lower() != target_group:
+                continue
+            
             item_dict = {
                 'name': getattr(item, 'Name', ''),
                 'alias': getattr(item, 'Alias', ''),
                 'group': getattr(item, 'Group', ''),
                 'base_unit': getattr(item, 'BaseUnit', ''),
-                'stock_group': getattr(item, 'StockGroup', ''),
-                'is_active': getattr(item, 'IsActive', True),
+                'stock_group': item_stock_group,
+                'is_active': is_active,
                 'opening_balance': getattr(item, 'OpeningBalance', 0),
                 'opening_rate': getattr(item, 'OpeningRate', 0),
                 'guid': getattr(item, 'GUID', '')
             }
-            result.append(item_dict)
-        
-        logger.info(f"Retrieved {len(result)} stock items")
-        return result
+            yield item_dict
         
     except Exception as e:
         logger.error(f"Failed to retrieve stock items: {e}")
         raise TallyConnectorError(f"Stock items retrieval failed: {e}")
 
 
+def get_stock_items_list(
+    connector: TallyConnector,
+    company_name: Optional[str] = None,
+    active_only: bool = False,
+    stock_group: Optional[str] = None
+) -> List[Dict]:
+    """
+    Retrieve the list of all inventory items to ensure products from OCR data exist in Tally.
+    
+    Args:
+        connector: Active TallyConnector instance
+        company_name: Optional company name filter
+        active_only: Skip inactive stock items while building the list
+        stock_group: Optional stock group to keep (case-insensitive)
+        
+    Returns:
+        List of stock item dictionaries
+        
+    Raises:
+        TallyConnectorError: If retrieval fails
+    """
+    result = list(iter_stock_items(connector, company_name, active_only, stock_group))
+    logger.info(f"Retrieved {len(result)} stock items")
+    return result
+
+
 def get_vouchers_list(connector: TallyConnector, filters: Optional[Dict] = None) -> List[Dict]:
     """
     Pull existing vouchers for reconciliation or to check if similar entries exist.
@@ -266,25 +344,23 @@ def _apply_voucher_filters(vouchers: List[Dict], filters: Dict) -> List[Dict]:
     return filtered
 
 
-def get_units_list(connector: TallyConnector, company_name: Optional[str] = None) -> List[Dict]:
+def iter_units(connector: TallyConnector, company_name: Optional[str] = None, active_only: bool = False) -> Iterator[Dict]:
     """
-    Retrieve the list of all units of measure from Tally.
+    Yield unit dictionaries one at a time while walking the Tally collection.
+    
+    Takes the same arguments as get_units_list, which materialises this generator.
     
-    Args:
-        connector: Active TallyConnector instance
-        company_name: Optional company name filter (not used currently)
-        
-    Returns:
-        List of unit dictionaries
-        
     Raises:
         TallyConnectorError: If retrieval fails
     """
     try:
         units = connector.session.get_units()
-        result = []
         
         for unit in units:
+            is_active = getattr(unit, 'IsActive', True)
+            if active_only and not is_active:
+                continue
+            
             # Handle None values from Tally data
             name = getattr(unit, 'Name', '') or ''
             decimal_places = getattr(unit, 'DecimalPlaces', 0) or 0
@@ -292,7 +368,6 @@ def get_units_list(connector: TallyConnector, company_name: Optional[str] = None
             base_unit = getattr(unit, 'BaseUnit', '') or ''
             conversion = getattr(unit, 'Conversion', 1.0) or 1.0
             guid = getattr(unit, 'GUID', '') or ''
-            is_active = getattr(unit, 'IsActive', True)
             
             unit_dict = {
                 'name': name,
@@ -305,16 +380,33 @@ def get_units_list(connector: TallyConnector, company_name: Optional[str] = None
                 'alter_id': getattr(unit, 'AlterId', 0) or 0,
                 'master_id': getattr(unit, 'MasterId', 0) or 0
             }
-            result.append(unit_dict)
-        
-        logger.info(f"Retrieved {len(result)} units")
-        return result
+            yield unit_dict
         
     except Exception as e:
         logger.error(f"Failed to retrieve units: {e}")
         raise TallyConnectorError(f"Units retrieval failed: {e}")
 
 
+def get_units_list(connector: TallyConnector, company_name: Optional[str] = None, active_only: bool = False) -> List[Dict]:
+    """
+    Retrieve the list of all units of measure from Tally.
+    
+    Args:
+        connector: Active TallyConnector instance
+        company_name: Optional company name filter (not used currently)
+        active_only: Skip inactive units while building the list
+        
+    Returns:
+        List of unit dictionaries
+        
+    Raises:
+        TallyConnectorError: If retrieval fails
+    """
+    result = list(iter_units(connector, company_name, active_only))
+    logger.info(f"Retrieved {len(result)} units")
+    return result
+
+
 def find_unit_by_name(connector: TallyConnector, unit_name: str) -> Optional[Dict]:
     """
     Find a specific unit by name (case-insensitive).
@@ -37,6 +37,11 @@ except ImportError as e:
 
 # -----------------------------------------------------------------------------
 
+# TallyService classes resolved per version. The .NET namespaces only become
+# importable after `_add_assembly_reference`, so they are looked up lazily on
+# first use and then reused by every subsequent session.
+_SERVICE_CLASSES: Dict[str, Any] = {}
+
 
 def _ensure_mono():
     """Set *MONO_PATH* on macOS so that the CLR can locate the Mono runtimes."""
@@ -64,6 +69,17 @@ def _add_assembly_reference(lib_dir: Path | str, assembly_name: str = "TallyConn
         raise
 
 
+def _load_service_class(version: str):
+    """Import the TallyService class for *version* (assembly must be referenced)."""
+    if version == "legacy":
+        from TallyConnector.Services import TallyService  # type: ignore
+        return TallyService
+    from TallyConnectorNew.Services.TallyPrime.V6 import (  # type: ignore
+        TallyPrimeService,
+    )
+    return TallyPrimeService
+
+
 class TallySession(AbstractContextManager):
     """
     Context‑manager that handles Tally operations through TallyConnector.
@@ -710,23 +726,22 @@ class TallySession(AbstractContextManager):
 
     def _create_service(self):
         """Create the appropriate TallyService based on version."""
-        if self.version == "legacy":
-            from TallyConnector.Services import TallyService
-            tally = TallyService()
-            tally.Setup(self.host, self.port)
-            return tally
-        elif self.version == "latest":
-            from TallyConnectorNew.Services.TallyPrime.V6 import (  # type: ignore
-                TallyPrimeService,
-            )
-            tally = TallyPrimeService()
-            tally.SetupTallyService(self.host, self.port) 
-            return tally
-        else:
+        if self.version not in ("legacy", "latest"):
             raise ValueError(
                 "version must be 'legacy', 'latest' – got %r" % self.version
             )
 
+        service_cls = _SERVICE_CLASSES.get(self.version)
+        if service_cls is None:
+            service_cls = _SERVICE_CLASSES[self.version] = _load_service_class(self.version)
+
+        tally = service_cls()
+        if self.version == "legacy":
+            tally.Setup(self.host, self.port)
+        else:
+            tally.SetupTallyService(self.host, self.port)
+        return tally
+
 
     @classmethod
     def from_user(cls, user, **kwargs):
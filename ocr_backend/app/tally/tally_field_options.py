@@ -3,17 +3,34 @@ Tally Field Options Helper
 
 Functions for loading Tally data (companies, ledgers, stock items) 
 as options for SELECT type template fields.
+
+Options are written with executemany INSERT/UPDATE statements; on Postgres or
+MSSQL their speed depends on the fast-executemany engine options set by
+Config.SQLALCHEMY_ENGINE_OPTIONS (see app.config.engine_options_for).
 """
 
+import functools
+import hashlib
 import logging
-from typing import Dict, List, Optional, Union
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
 
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import load_only, raiseload
+
 from .. import db
 from ..models import TemplateField, FieldOption, SubTemplateField, SubTemplateFieldOption
 from ..utils.enums import FieldType, FieldName, DataType
+from .config import TallyConfig
 from .connector import TallyConnector, TallyConnectorError
-from .data_retrieval import get_companies_list, get_ledgers_list, get_stock_items_list, get_units_list
+from .data_retrieval import iter_companies, iter_ledgers, iter_stock_items, iter_units
 
 logger = logging.getLogger(__name__)
 
@@ -23,72 +40,592 @@ class TallyFieldOptionsError(Exception):
     pass
 
 
-def load_companies_as_options(field_id: int, clear_existing: bool = True) -> Dict:
+# Maximum rows per bulk INSERT / DELETE IN-list so very large Tally lists stay under driver
+# parameter limits and only one page of mappings is built at a time (TALLY_OPTIONS_PAGE_SIZE)
+_INSERT_PAGE_SIZE = TallyConfig.OPTIONS_PAGE_SIZE
+
+# Short-lived cache of active Tally rows keyed by (fetcher, version, host, port), so
+# back-to-back loads (e.g. vendor then customer options) reuse a single fetch
+_tally_cache: Dict[Tuple, Tuple[float, List[Dict]]] = {}
+_tally_cache_lock = threading.Lock()
+
+# Single-column lookups used to validate fields without hydrating full ORM rows
+_FIELD_TYPE_STMT = select(TemplateField.field_type).where(
+    TemplateField.field_id == bindparam('field_id')
+)
+_SUB_FIELD_DATA_TYPE_STMT = select(SubTemplateField.data_type).where(
+    SubTemplateField.sub_temp_field_id == bindparam('sub_field_id')
+)
+
+# Column-level option listing for get_field_options_summary
+_FIELD_OPTIONS_SUMMARY_STMT = select(
+    FieldOption.options_id, FieldOption.field_id, FieldOption.option_value,
+    FieldOption.option_label, FieldOption.created_at, FieldOption.updated_at
+).where(FieldOption.field_id == bindparam('field_id')).order_by(FieldOption.options_id)
+
+# The field lookup tables below are read-only (MappingProxyType / frozenset) and built once at import.
+
+# Map template field names to the Tally data set (and group filter) that supplies their options.
+# Only include fields that actually need Tally data
+_FIELD_TALLY_SOURCES = MappingProxyType({
+    # Vendor/Customer fields (need ledgers from Tally)
+    FieldName.VENDOR_NAME: ('ledgers', 'Sundry Creditors'),
+    FieldName.CUSTOMER_NAME: ('ledgers', 'Sundry Debtors'),
+
+    # Stock item fields (need items from Tally)
+    FieldName.ITEM_DESCRIPTION: ('stock_items', None),
+    FieldName.ITEM_CODE: ('stock_items', None),
+
+    # Unit of measurement fields (need units from Tally)
+    FieldName.UNIT_OF_MEASUREMENT: ('units', None),
+
+    # Payment related fields that might need ledgers
+    FieldName.BANK_ACCOUNT_NUMBER: ('ledgers', 'Bank Accounts'),
+
+    # Place of supply might need state/location data
+    FieldName.PLACE_OF_SUPPLY: ('ledgers', 'States'),
+})
+
+# Fields that should NOT auto-load from Tally (document-specific values)
+_NON_TALLY_FIELDS = frozenset({
+    FieldName.INVOICE_NUMBER,
+    FieldName.PO_NUMBER, 
+    FieldName.CHALLAN_NUMBER,
+    FieldName.EWAY_BILL_NUMBER,
+    FieldName.VOUCHER_REFERENCE,
+    FieldName.LR_NUMBER,
+    FieldName.VEHICLE_NUMBER,
+    FieldName.INVOICE_DATE,
+    FieldName.DUE_DATE,
+    FieldName.CHALLAN_DATE,
+    FieldName.EWAY_BILL_DATE,
+    # Amounts and quantities (should be TEXT/NUMBER, not SELECT)
+    FieldName.QUANTITY,
+    FieldName.UNIT_PRICE,
+    FieldName.LINE_TOTAL,
+    FieldName.TOTAL_AMOUNT,
+    FieldName.SUBTOTAL,
+    FieldName.GST_RATE,
+    FieldName.CGST_RATE,
+    FieldName.SGST_RATE,
+    FieldName.IGST_RATE,
+    FieldName.TAXABLE_VALUE,
+    FieldName.CGST_AMOUNT,
+    FieldName.SGST_AMOUNT,
+    FieldName.IGST_AMOUNT,
+    # Other document-specific fields
+    FieldName.HSN_CODE,
+    FieldName.SAC_CODE,
+    FieldName.VENDOR_GSTIN,
+    FieldName.CUSTOMER_GSTIN,
+    FieldName.VENDOR_PAN,
+    FieldName.CUSTOMER_PAN,
+    FieldName.IFSC_CODE,
+    FieldName.UPI_ID,
+})
+
+# Static option fields that should have predefined values, not Tally data
+_STATIC_FIELD_OPTIONS = MappingProxyType({
+    FieldName.BILL_TYPE: ('Tax Invoice', 'Bill of Supply', 'Export Invoice', 'Debit Note', 'Credit Note'),
+    FieldName.VOUCHER_TYPE: ('Sales', 'Purchase', 'Receipt', 'Payment', 'Journal', 'Contra'),
+    FieldName.PAYMENT_STATUS: ('Paid', 'Unpaid', 'Partially Paid', 'Overdue'),
+    FieldName.PAYMENT_MODE: ('Cash', 'Cheque', 'NEFT', 'RTGS', 'UPI', 'Card', 'Bank Transfer'),
+    FieldName.CURRENCY: ('INR', 'USD', 'EUR', 'GBP', 'AED', 'SGD'),
+    FieldName.TRANSPORT_MODE: ('Road', 'Rail', 'Air', 'Ship'),
+    FieldName.SUPPLY_TYPE: ('Taxable', 'Non-Taxable', 'Exempt', 'Zero Rated'),
+    FieldName.REVERSE_CHARGE: ('Yes', 'No'),
+    FieldName.IS_EXPORT: ('Yes', 'No'),
+    FieldName.IS_COMPOSITE_SUPPLY: ('Yes', 'No'),
+})
+
+# Map sub-template field names to the Tally data set (and group filter) that supplies their options
+_SUB_FIELD_TALLY_SOURCES = MappingProxyType({
+    # Stock item fields
+    FieldName.ITEM_DESCRIPTION: ('stock_items', None),
+    FieldName.ITEM_CODE: ('stock_items', None),
+
+    # Vendor/Customer fields
+    FieldName.VENDOR_NAME: ('ledgers', 'Sundry Creditors'),
+    FieldName.CUSTOMER_NAME: ('ledgers', 'Sundry Debtors'),
+
+    # Unit of measurement fields
+    FieldName.UNIT_OF_MEASUREMENT: ('units', None),
+})
+
+# Tally data set -> (data_retrieval iter_* function, TallyConnector version)
+_TALLY_DATA_SOURCES = MappingProxyType({
+    'companies': (iter_companies, "latest"),
+    'ledgers': (iter_ledgers, "latest"),
+    'stock_items': (iter_stock_items, "latest"),
+    'units': (iter_units, "legacy"),
+})
+
+# Keyword families used when a field name has no explicit mapping. One alternation
+# group per family, so a single scan reports every family present in the name
+# ('measure' also covers 'measurement'; matched case-insensitively)
+_FALLBACK_RE = re.compile(
+    r'(vendor|supplier|creditor)|(customer|client|debtor)|(item|product|stock)'
+    r'|(unit|uom|measure)|(company)|(name)|(description)',
+    re.IGNORECASE
+)
+_KW_VENDOR, _KW_CUSTOMER, _KW_ITEM, _KW_UNIT, _KW_COMPANY, _KW_NAME, _KW_DESCRIPTION = range(1, 8)
+
+# Keys of the retrieved Tally rows that option loading uses (everything else is dropped before caching).
+# Group names are only ever matched case-insensitively, so they are cached lower-cased and
+# interned: each distinct group is lowered once per fetch and shared by all of its rows
+_OPTION_ROW_KEYS = ('name', 'alias')
+_GROUP_ROW_KEYS = ('group', 'stock_group')
+
+# Row key holding the group name for the Tally data sets that can be filtered by group
+_GROUP_KEYS = MappingProxyType({'ledgers': 'group', 'stock_items': 'stock_group'})
+
+# Tally data set -> (noun and plural used in messages, whether the alias is the label,
+# noun of its group filter, result key echoing the group) for the option loaders
+_OPTION_SOURCES = MappingProxyType({
+    'companies': ('company', 'companies', False, None, None),
+    'ledgers': ('ledger', 'ledgers', True, 'group', 'ledger_group'),
+    'stock_items': ('stock item', 'stock items', True, 'stock group', 'stock_group'),
+    'units': ('unit', 'units', False, None, None),
+})
+
+
+def _validate_select_field(field_id: int) -> None:
+    """Raise TallyFieldOptionsError unless the template field exists and is SELECT type."""
+    field_type = db.session.execute(_FIELD_TYPE_STMT, {'field_id': field_id}).scalar()
+    if field_type is None:
+        raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
+    
+    if field_type != FieldType.SELECT:
+        raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
+
+
+def _validate_select_sub_field(sub_field_id: int) -> None:
+    """Raise TallyFieldOptionsError unless the sub-template field exists and is SELECT type."""
+    data_type = db.session.execute(_SUB_FIELD_DATA_TYPE_STMT, {'sub_field_id': sub_field_id}).scalar()
+    if data_type is None:
+        raise TallyFieldOptionsError(f"Sub-field with ID {sub_field_id} not found")
+    
+    if data_type != DataType.SELECT:
+        raise TallyFieldOptionsError(f"Sub-field {sub_field_id} is not a SELECT type field")
+
+
+def _field_query(model, *columns):
     """
-    Load Tally companies as options for a SELECT field.
+    Query for TemplateField / SubTemplateField lookups. With RAISELOAD_DEV set, any
+    lazy relationship access on the result raises instead of silently adding N+1
+    queries to the (batch) refresh paths.
+    
+    When `columns` are given only those (plus the primary key) are loaded; the
+    option loaders never need the rest of the row, e.g. ai_instructions.
+    """
+    query = model.query
+    if columns:
+        query = query.options(load_only(*columns))
+    if current_app.config.get('RAISELOAD_DEV'):
+        query = query.options(raiseload('*'))
+    return query
+
+
+def _load_fields_batch(field_ids: List[int]) -> Dict[int, TemplateField]:
+    """Fetch template fields in one IN-list query, keyed by field ID."""
+    query = _field_query(TemplateField, TemplateField.field_type, TemplateField.field_name)
+    return {
+        field.field_id: field
+        for field in query.filter(TemplateField.field_id.in_(field_ids)).all()
+    }
+
+
+def _load_sub_fields_batch(sub_field_ids: List[int]) -> Dict[int, SubTemplateField]:
+    """Fetch sub-template fields in one IN-list query, keyed by sub-field ID."""
+    query = _field_query(SubTemplateField, SubTemplateField.data_type, SubTemplateField.field_name)
+    return {
+        sub_field.sub_temp_field_id: sub_field
+        for sub_field in query.filter(SubTemplateField.sub_temp_field_id.in_(sub_field_ids)).all()
+    }
+
+
+def _cached_tally_list(key: Tuple, now: float) -> Optional[List[Dict]]:
+    """Return the cached rows for `key` if they are younger than TallyConfig.OPTIONS_CACHE_TTL."""
+    with _tally_cache_lock:
+        cached = _tally_cache.get(key)
+    if cached and now - cached[0] < TallyConfig.OPTIONS_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _read_tally_list(fetcher: Callable, tally: TallyConnector, key: Tuple, now: float) -> List[Dict]:
+    """Fetch active rows over an open connector and cache them under `key` ((fetcher, version, host, port))."""
+    # Stream rows out of Tally, keeping only the keys the option loaders read so
+    # the cached list stays small
+    folded_groups = {}
+    rows = []
+    for row in fetcher(tally, active_only=True):
+        option_row = {key: row[key] for key in _OPTION_ROW_KEYS if key in row}
+        for group_key in _GROUP_ROW_KEYS:
+            if group_key in row:
+                group = row[group_key] or ''
+                folded = folded_groups.get(group)
+                if folded is None:
+                    folded = folded_groups[group] = sys.intern(group.lower())
+                option_row[group_key] = folded
+        rows.append(option_row)
+    host = key[2]
+    logger.info("Retrieved %d rows with %s from %s", len(rows), fetcher.__name__, host)
+    
+    with _tally_cache_lock:
+        # Drop expired entries so per-user hosts don't accumulate
+        for stale_key in [k for k, (fetched_at, _) in _tally_cache.items() if now - fetched_at >= TallyConfig.OPTIONS_CACHE_TTL]:
+            del _tally_cache[stale_key]
+        _tally_cache[key] = (now, rows)
+    return rows
+
+
+def _fetch_tally_list(fetcher: Callable, version: str) -> List[Dict]:
+    """
+    Fetch active rows with a data_retrieval iter_* function, reusing a cached result
+    for the same Tally host if it is younger than TallyConfig.OPTIONS_CACHE_TTL seconds.
+    
+    The returned list is shared between callers and must not be mutated.
+    """
+    host, port = TallyConfig.get_host_and_port()
+    key = (fetcher.__name__, version, host, port)
+    now = time.monotonic()
+    
+    rows = _cached_tally_list(key, now)
+    if rows is not None:
+        logger.debug("Using cached %s result for %s", fetcher.__name__, host)
+        return rows
+    
+    with TallyConnector(version=version, host=host, port=port) as tally:
+        return _read_tally_list(fetcher, tally, key, now)
+
+
+def invalidate_tally_cache() -> None:
+    """Forget cached Tally lists so the next load fetches fresh data."""
+    with _tally_cache_lock:
+        _tally_cache.clear()
+
+
+def _fetch_version_datasets(version: str, sources: List[str], host: str, port: int,
+                            now: float) -> Dict[str, Union[List[Dict], Exception]]:
+    """Fetch several data sets served by one connector version over a single connection."""
+    datasets = {}
+    try:
+        with TallyConnector(version=version, host=host, port=port) as tally:
+            for source in sources:
+                fetcher = _TALLY_DATA_SOURCES[source][0]
+                try:
+                    datasets[source] = _read_tally_list(fetcher, tally, (fetcher.__name__, version, host, port), now)
+                except Exception as e:
+                    logger.error(f"Failed to fetch {source} from Tally: {e}")
+                    datasets[source] = e
+    except Exception as e:
+        for source in sources:
+            if source not in datasets:
+                logger.error(f"Failed to fetch {source} from Tally: {e}")
+                datasets[source] = e
+    return datasets
+
+
+def _fetch_tally_datasets(sources) -> Dict[str, Union[List[Dict], Exception]]:
+    """
+    Fetch each named Tally data set once for a batch load.
+    
+    A data set that cannot be fetched maps to the raised exception so the
+    fields depending on it can be reported without failing the whole batch.
+    Data sets served by the same connector version share one connection; when
+    both versions have cache misses, the two connections fetch concurrently.
+    """
+    # Resolve the host here: it may depend on the request context, which the
+    # fetch threads do not have
+    host, port = TallyConfig.get_host_and_port()
+    now = time.monotonic()
+    
+    datasets = {}
+    missing = {}
+    for source in sources:
+        fetcher, version = _TALLY_DATA_SOURCES[source]
+        rows = _cached_tally_list((fetcher.__name__, version, host, port), now)
+        if rows is not None:
+            datasets[source] = rows
+        else:
+            missing.setdefault(version, []).append(source)
+    
+    if len(missing) > 1:
+        # Tally calls are I/O bound (pythonnet releases the GIL while .NET waits)
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            futures = [
+                executor.submit(_fetch_version_datasets, version, version_sources, host, port, now)
+                for version, version_sources in missing.items()
+            ]
+            for future in futures:
+                datasets.update(future.result())
+    else:
+        for version, version_sources in missing.items():
+            datasets.update(_fetch_version_datasets(version, version_sources, host, port, now))
+    return datasets
+
+
+def _filter_by_group(rows: List[Dict], group_key: str, group: Optional[str]) -> Iterable[Dict]:
+    """
+    Lazily keep rows whose `group_key` matches `group` (case-insensitive); no-op without a group.
+    
+    Returns a generator so the group check is fused into the caller's single pass
+    that builds the option pairs, instead of materialising an intermediate list.
+    Cached rows already hold lower-cased group names, so only `group` is lowered.
+    """
+    if not group:
+        return rows
+    target = group.lower()
+    return (row for row in rows if row.get(group_key) == target)
+
+
+def _index_by_group(rows: List[Dict], group_key: str) -> Dict[str, List[Dict]]:
+    """Bucket rows by their (already lower-cased) `group_key` so each group filter becomes a dict lookup."""
+    index = {}
+    for row in rows:
+        index.setdefault(row.get(group_key, ''), []).append(row)
+    return index
+
+
+def _select_group(rows: List[Dict], source: str, group: Optional[str], group_indexes: Dict) -> List[Dict]:
+    """
+    Rows of a fetched Tally data set that belong to `group`, for batch loads.
+    
+    The data set is indexed by group on first use (cached in `group_indexes`), so
+    several fields filtering the same list by different groups share one pass.
+    """
+    if not group or source not in _GROUP_KEYS:
+        return rows
+    if source not in group_indexes:
+        group_indexes[source] = _index_by_group(rows, _GROUP_KEYS[source])
+    return group_indexes[source].get(group.lower(), [])
+
+
+def _bulk_insert_returning_ids(stmt, mappings: List[Dict], pk_col) -> Optional[List[int]]:
+    """
+    Execute an INSERT for many rows in one executemany round-trip, returning their primary
+    keys when the database supports INSERT ... RETURNING for executemany (None otherwise).
+    """
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        return list(db.session.execute(stmt.returning(pk_col), mappings).scalars())
+    db.session.execute(stmt, mappings)
+    return None
+
+
+def _options_digest(options: List[Tuple[str, str]]) -> str:
+    """BLAKE2 digest of the (value, label) pairs, used to detect an unchanged option list."""
+    digest = hashlib.blake2b(digest_size=16)
+    for value, label in options:
+        digest.update(f'{value}\0{label}\0'.encode())
+    return digest.hexdigest()
+
+
+def _store_options(model, owner_model, owner_column: str, owner_id: int, options: List[Tuple[str, str]],
+                   clear_existing: bool) -> Tuple[int, Optional[List[int]], bool]:
+    """
+    Persist (value, label) option pairs for a field or sub-field.
+    
+    With clear_existing the stored options are synchronised to `options` instead of
+    being wiped and re-inserted: rows whose value is no longer present (or duplicated)
+    are deleted, changed labels are updated in place and only new values are inserted.
+    Unchanged rows are left untouched. When the list's digest matches the owner's
+    options_hash from the previous sync, nothing is read or written at all.
     
-    Args:
-        field_id: ID of the template field
-        clear_existing: Whether to clear existing options before loading
-        
     Returns:
-        Dict with success status and loaded options count
-        
+        (number of options the field now has from this load, IDs of the rows inserted
+        by this load or None if the database cannot return them, whether the list
+        matched the previous sync and nothing was written)
+    """
+    table = model.__table__
+    owner = table.c[owner_column]
+    pk = list(table.primary_key.columns)[0]
+    owner_table = owner_model.__table__
+    owner_pk = list(owner_table.primary_key.columns)[0]
+    
+    # Keep the read-diff-write sequence free of intermediate autoflushes of
+    # unrelated pending session state; it is flushed once on commit
+    with db.session.no_autoflush:
+        digest = None
+        if clear_existing:
+            digest = _options_digest(options)
+            stored_digest = db.session.execute(
+                select(owner_table.c.options_hash).where(owner_pk == owner_id)
+            ).scalar()
+            if stored_digest == digest:
+                return len(options), [], True
+        
+        new_options = options
+        if clear_existing:
+            labels = dict(options)
+            kept = {}
+            stale_ids = []
+            existing = db.session.execute(
+                select(pk, table.c.option_value, table.c.option_label).where(owner == owner_id)
+            ).all()
+            for option_id, value, label in existing:
+                if value in labels and value not in kept:
+                    kept[value] = label
+                else:
+                    stale_ids.append(option_id)
+            
+            if stale_ids and not kept:
+                # Nothing survives: one DELETE ... WHERE owner = ? instead of ID pages
+                db.session.execute(delete(table).where(owner == owner_id))
+            else:
+                for start in range(0, len(stale_ids), _INSERT_PAGE_SIZE):
+                    db.session.execute(delete(table).where(pk.in_(stale_ids[start:start + _INSERT_PAGE_SIZE])))
+            
+            relabelled = [
+                {'b_value': value, 'b_label': labels[value]}
+                for value, label in kept.items() if label != labels[value]
+            ]
+            if relabelled:
+                db.session.execute(
+                    update(table)
+                    .where(owner == owner_id, table.c.option_value == bindparam('b_value'))
+                    .values(option_label=bindparam('b_label')),
+                    relabelled
+                )
+            
+            new_options = [(value, label) for value, label in options if value not in kept]
+        
+        # Core executemany INSERT: no ORM mapper work per row; the timestamp columns
+        # still get their column-level Python defaults. The owner ID is bound once on
+        # the statement, so each row mapping only carries the value and label
+        insert_stmt = insert(table).values({owner_column: owner_id})
+        option_ids = []
+        for start in range(0, len(new_options), _INSERT_PAGE_SIZE):
+            inserted_ids = _bulk_insert_returning_ids(insert_stmt, [
+                {'option_value': value, 'option_label': label}
+                for value, label in new_options[start:start + _INSERT_PAGE_SIZE]
+            ], pk)
+            if inserted_ids is None:
+                option_ids = None
+            elif option_ids is not None:
+                option_ids.extend(inserted_ids)
+        
+        # Remember what was synced (appends leave the list unknown); keep the
+        # owner's updated_at as it is, since only its options changed
+        db.session.execute(
+            update(owner_table)
+            .where(owner_pk == owner_id)
+            .values(options_hash=digest, updated_at=owner_table.c.updated_at)
+        )
+    
+    return len(options), option_ids, False
+
+
+def _store_field_options(field_id: int, options: List[Tuple[str, str]], clear_existing: bool) -> Tuple[int, Optional[List[int]], bool]:
+    """Persist option pairs as FieldOption rows for a template field."""
+    return _store_options(FieldOption, TemplateField, 'field_id', field_id, options, clear_existing)
+
+
+def _store_sub_field_options(sub_field_id: int, options: List[Tuple[str, str]], clear_existing: bool) -> Tuple[int, Optional[List[int]], bool]:
+    """Persist option pairs as SubTemplateFieldOption rows for a sub-template field."""
+    return _store_options(SubTemplateFieldOption, SubTemplateField, 'sub_temp_field_id', sub_field_id, options, clear_existing)
+
+
+# Option owner -> (validator, option store, result ID key, noun used in messages)
+_OPTION_OWNERS = MappingProxyType({
+    'field': (_validate_select_field, _store_field_options, 'field_id', 'field'),
+    'sub_field': (_validate_select_sub_field, _store_sub_field_options, 'sub_field_id', 'sub-field'),
+})
+
+
+def _load_source_impl(owner: str, owner_id: int, source: str, rows: Iterable[Dict],
+                      group: Optional[str], clear_existing: bool) -> Dict:
+    """
+    Store rows of a Tally data set (already filtered to `group`) as options without committing.
+    
+    Args:
+        owner: 'field' or 'sub_field' (key of _OPTION_OWNERS)
+        owner_id: ID of the template field or sub-template field
+        source: Key of _OPTION_SOURCES
+        rows: Fetched Tally rows
+        group: Group the rows were filtered by, echoed in the message and result
+        clear_existing: Whether to replace the existing options
+    """
+    _, store, id_key, owner_noun = _OPTION_OWNERS[owner]
+    noun, _, use_alias, group_noun, group_result_key = _OPTION_SOURCES[source]
+    
+    if use_alias:
+        # Always use actual name as value, alias (or name) for display
+        options = [(row['name'], row.get('alias') or row['name']) for row in rows]
+    else:
+        # Use name as both value and label
+        options = [(row['name'], row['name']) for row in rows]
+    
+    options_created, option_ids, unchanged = store(owner_id, options, clear_existing)
+    
+    group_filter_msg = f" (filtered by {group_noun}: {group})" if group_noun and group else ""
+    logger.info("Loaded %d %s options for %s %s%s", options_created, noun, owner_noun, owner_id, group_filter_msg)
+    
+    result = {
+        'success': True,
+        'message': f'Successfully loaded {options_created} {noun} options{group_filter_msg}',
+        'options_count': options_created,
+        'option_ids': option_ids,
+        id_key: owner_id
+    }
+    if group_result_key:
+        result[group_result_key] = group
+    if unchanged:
+        result['skip_reason'] = 'unchanged'
+    return result
+
+
+def _load_options(owner: str, owner_id: int, source: str, group: Optional[str], clear_existing: bool) -> Dict:
+    """
+    Validate the owner, fetch a Tally data set, store it as options and commit.
+    
+    Shared body of the load_*_as_options / load_*_as_sub_field_options functions.
+    
     Raises:
         TallyFieldOptionsError: If loading fails
     """
+    validate, _, _, owner_noun = _OPTION_OWNERS[owner]
+    plural = _OPTION_SOURCES[source][1]
     try:
-        # Validate field exists and is SELECT type
-        field = TemplateField.query.get(field_id)
-        if not field:
-            raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
-        
-        if field.field_type != FieldType.SELECT:
-            raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
+        # Validate the field exists and is SELECT type
+        validate(owner_id)
         
-        # Clear existing options if requested
-        if clear_existing:
-            FieldOption.query.filter_by(field_id=field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch companies
-        with TallyConnector(version="latest") as tally:
-            companies = get_companies_list(tally)
-        
-        # Create field options from companies
-        options_created = 0
-        for company in companies:
-            # Skip inactive companies
-            if not company.get('is_active', True):
-                continue
-                
-            option = FieldOption(
-                field_id=field_id,
-                option_value=company['name'],  # Use name as value
-                option_label=company['name']   # Use name as label
-            )
-            db.session.add(option)
-            options_created += 1
+        # Fetch active rows from Tally (or the short-lived cache) and filter by group
+        fetcher, version = _TALLY_DATA_SOURCES[source]
+        rows = _fetch_tally_list(fetcher, version)
+        if source in _GROUP_KEYS:
+            rows = _filter_by_group(rows, _GROUP_KEYS[source], group)
         
+        result = _load_source_impl(owner, owner_id, source, rows, group, clear_existing)
         db.session.commit()
-        
-        logger.info(f"Loaded {options_created} company options for field {field_id}")
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} company options',
-            'options_count': options_created,
-            'field_id': field_id
-        }
+        return result
         
     except TallyConnectorError as e:
         db.session.rollback()
-        logger.error(f"Tally connection error while loading companies for field {field_id}: {e}")
+        logger.error(f"Tally connection error while loading {plural} for {owner_noun} {owner_id}: {e}")
         raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
     
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error loading companies for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load companies: {e}")
+        logger.error(f"Error loading {plural} for {owner_noun} {owner_id}: {e}")
+        raise TallyFieldOptionsError(f"Failed to load {plural}: {e}")
+
+
+def load_companies_as_options(field_id: int, clear_existing: bool = True) -> Dict:
+    """
+    Load Tally companies as options for a SELECT field.
+    
+    Args:
+        field_id: ID of the template field
+        clear_existing: Whether to clear existing options before loading
+        
+    Returns:
+        Dict with success status and loaded options count
+        
+    Raises:
+        TallyFieldOptionsError: If loading fails
+    """
+    return _load_options('field', field_id, 'companies', None, clear_existing)
 
 
 def load_ledgers_as_options(field_id: int, ledger_group: Optional[str] = None, clear_existing: bool = True) -> Dict:
@@ -106,69 +643,7 @@ def load_ledgers_as_options(field_id: int, ledger_group: Optional[str] = None, c
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate field exists and is SELECT type
-        field = TemplateField.query.get(field_id)
-        if not field:
-            raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
-        
-        if field.field_type != FieldType.SELECT:
-            raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            FieldOption.query.filter_by(field_id=field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch ledgers
-        with TallyConnector(version="latest") as tally:
-
-            ledgers = get_ledgers_list(tally)
-        
-        # Filter by group if specified
-        if ledger_group:
-            ledgers = [l for l in ledgers if l.get('group', '').lower() == ledger_group.lower()]
-        
-        # Create field options from ledgers
-        options_created = 0
-        for ledger in ledgers:
-            # Skip inactive ledgers
-            if not ledger.get('is_active', True):
-                continue
-                
-            # Use alias if available, otherwise use name
-            display_name = ledger.get('alias') or ledger['name']
-            
-            option = FieldOption(
-                field_id=field_id,
-                option_value=ledger['name'],    # Always use actual name as value
-                option_label=display_name       # Use alias or name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
-        
-        group_filter_msg = f" (filtered by group: {ledger_group})" if ledger_group else ""
-        logger.info(f"Loaded {options_created} ledger options for field {field_id}{group_filter_msg}")
-        
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} ledger options{group_filter_msg}',
-            'options_count': options_created,
-            'field_id': field_id,
-            'ledger_group': ledger_group
-        }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading ledgers for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
-    
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading ledgers for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load ledgers: {e}")
+    return _load_options('field', field_id, 'ledgers', ledger_group, clear_existing)
 
 
 def load_stock_items_as_options(field_id: int, stock_group: Optional[str] = None, clear_existing: bool = True) -> Dict:
@@ -186,68 +661,7 @@ def load_stock_items_as_options(field_id: int, stock_group: Optional[str] = None
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate field exists and is SELECT type
-        field = TemplateField.query.get(field_id)
-        if not field:
-            raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
-        
-        if field.field_type != FieldType.SELECT:
-            raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            FieldOption.query.filter_by(field_id=field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch stock items
-        with TallyConnector(version="latest") as tally:
-            stock_items = get_stock_items_list(tally)
-        
-        # Filter by stock group if specified
-        if stock_group:
-            stock_items = [item for item in stock_items if item.get('stock_group', '').lower() == stock_group.lower()]
-        
-        # Create field options from stock items
-        options_created = 0
-        for item in stock_items:
-            # Skip inactive items
-            if not item.get('is_active', True):
-                continue
-                
-            # Use alias if available, otherwise use name
-            display_name = item.get('alias') or item['name']
-            
-            option = FieldOption(
-                field_id=field_id,
-                option_value=item['name'],      # Always use actual name as value
-                option_label=display_name       # Use alias or name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
-        
-        group_filter_msg = f" (filtered by stock group: {stock_group})" if stock_group else ""
-        logger.info(f"Loaded {options_created} stock item options for field {field_id}{group_filter_msg}")
-        
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} stock item options{group_filter_msg}',
-            'options_count': options_created,
-            'field_id': field_id,
-            'stock_group': stock_group
-        }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading stock items for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
-    
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading stock items for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load stock items: {e}")
+    return _load_options('field', field_id, 'stock_items', stock_group, clear_existing)
 
 
 def load_units_as_options(field_id: int, clear_existing: bool = True) -> Dict:
@@ -264,62 +678,105 @@ def load_units_as_options(field_id: int, clear_existing: bool = True) -> Dict:
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate field exists and is SELECT type
-        field = TemplateField.query.get(field_id)
-        if not field:
-            raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
-        
-        if field.field_type != FieldType.SELECT:
-            raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            FieldOption.query.filter_by(field_id=field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch units
-        with TallyConnector(version="legacy") as tally:
-            units = get_units_list(tally)
-        
-        # Create field options from units
-        options_created = 0
-        for unit in units:
-            # Skip inactive units
-            if not unit.get('is_active', True):
-                continue
-                
-            # Use name for both value and display
-            display_name = unit['name']
-            
-            option = FieldOption(
-                field_id=field_id,
-                option_value=unit['name'],      # Use actual name as value
-                option_label=display_name       # Use name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
+    return _load_options('field', field_id, 'units', None, clear_existing)
+
+
+@functools.lru_cache(maxsize=None)
+def _fallback_keyword_hits(field_name: FieldName) -> frozenset:
+    """
+    Return the _FALLBACK_RE group numbers (_KW_*) whose keywords occur in the field name.
+    
+    FieldName is a closed enum, so each member is scanned once per process.
+    """
+    return frozenset(match.lastindex for match in _FALLBACK_RE.finditer(field_name.value))
+
+
+def _resolve_field_source(field_name: FieldName) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Work out where a template field's options come from.
+    
+    Returns:
+        (source, group_filter) where source is 'non_tally', 'static', a key of
+        _TALLY_DATA_SOURCES, or None when no mapping is defined
+    """
+    if field_name in _NON_TALLY_FIELDS:
+        return 'non_tally', None
+    
+    if field_name in _STATIC_FIELD_OPTIONS:
+        return 'static', None
+    
+    mapped = _FIELD_TALLY_SOURCES.get(field_name)
+    if mapped:
+        return mapped
+    
+    # Fallback: check field name string for common patterns (only for very specific cases)
+    hits = _fallback_keyword_hits(field_name)
+    has_name = _KW_NAME in hits
+    
+    # Only load Tally data if the field name strongly suggests it needs specific Tally data
+    if _KW_VENDOR in hits and has_name:
+        return 'ledgers', 'Sundry Creditors'
+    elif _KW_CUSTOMER in hits and has_name:
+        return 'ledgers', 'Sundry Debtors'
+    elif _KW_ITEM in hits and (_KW_DESCRIPTION in hits or has_name):
+        return 'stock_items', None
+    elif _KW_UNIT in hits:
+        return 'units', None
+    elif _KW_COMPANY in hits and has_name:
+        return 'companies', None
+    
+    return None, None
+
+
+def _load_field_from_source(field_id: int, field_name: FieldName, source: Optional[str],
+                            group_filter: Optional[str], rows: Optional[List[Dict]],
+                            clear_existing: bool) -> Dict:
+    """
+    Store options for a field from an already-resolved source without committing.
+    
+    `rows` must hold the fetched Tally data set (already filtered to `group_filter`)
+    when `source` is a Tally data set.
+    """
+    if source == 'non_tally':
+        logger.info("Field %s is marked as non-Tally field. Skipping auto-load.", field_name.value)
+        return {
+            'success': True,
+            'message': f'Field {field_name.value} does not require Tally data loading',
+            'options_count': 0,
+            'field_id': field_id,
+            'skip_reason': 'non_tally_field'
+        }
+    
+    if source == 'static':
+        logger.info("Loading static options for field %s", field_name.value)
+        options = [(option_value, option_value) for option_value in _STATIC_FIELD_OPTIONS[field_name]]
         
-        logger.info(f"Loaded {options_created} unit options for field {field_id}")
+        options_created, option_ids, unchanged = _store_field_options(field_id, options, clear_existing)
         
-        return {
+        result = {
             'success': True,
-            'message': f'Successfully loaded {options_created} unit options',
+            'message': f'Successfully loaded {options_created} static options',
             'options_count': options_created,
-            'field_id': field_id
+            'option_ids': option_ids,
+            'field_id': field_id,
+            'data_source': 'static_options'
         }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading units for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
+        if unchanged:
+            result['skip_reason'] = 'unchanged'
+        return result
     
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading units for field {field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load units: {e}")
+    if source in _TALLY_DATA_SOURCES:
+        return _load_source_impl('field', field_id, source, rows, group_filter, clear_existing)
+    
+    # Don't auto-load anything for unrecognized fields
+    logger.warning("Field %s doesn't have a defined Tally data mapping. Skipping auto-load.", field_name.value)
+    return {
+        'success': True,
+        'message': f'Field {field_name.value} does not have a defined Tally data mapping',
+        'options_count': 0,
+        'field_id': field_id,
+        'skip_reason': 'no_mapping_defined'
+    }
 
 
 def auto_load_tally_options(field_id: int, clear_existing: bool = True) -> Dict:
@@ -338,7 +795,7 @@ def auto_load_tally_options(field_id: int, clear_existing: bool = True) -> Dict:
     """
     try:
         # Get field information
-        field = TemplateField.query.get(field_id)
+        field = _field_query(TemplateField, TemplateField.field_type, TemplateField.field_name).get(field_id)
         if not field:
             raise TallyFieldOptionsError(f"Field with ID {field_id} not found")
         
@@ -346,160 +803,78 @@ def auto_load_tally_options(field_id: int, clear_existing: bool = True) -> Dict:
             raise TallyFieldOptionsError(f"Field {field_id} is not a SELECT type field")
         
         field_name = field.field_name
+        source, group_filter = _resolve_field_source(field_name)
         
-        # Map field names to Tally data types
-        # Only include fields that actually need Tally data
-        field_mapping = {
-            # Vendor/Customer fields (need ledgers from Tally)
-            FieldName.VENDOR_NAME: ('ledgers', 'Sundry Creditors'),
-            FieldName.CUSTOMER_NAME: ('ledgers', 'Sundry Debtors'),
-            
-            # Stock item fields (need items from Tally)
-            FieldName.ITEM_DESCRIPTION: ('stock_items', None),
-            FieldName.ITEM_CODE: ('stock_items', None),
-            
-            # Unit of measurement fields (need units from Tally)
-            FieldName.UNIT_OF_MEASUREMENT: ('units', None),
-            
-            # Payment related fields that might need ledgers
-            FieldName.BANK_ACCOUNT_NUMBER: ('ledgers', 'Bank Accounts'),
-            
-            # Place of supply might need state/location data
-            FieldName.PLACE_OF_SUPPLY: ('ledgers', 'States'),
-        }
-        
-        # Fields that should NOT auto-load from Tally (document-specific values)
-        non_tally_fields = {
-            FieldName.INVOICE_NUMBER,
-            FieldName.PO_NUMBER, 
-            FieldName.CHALLAN_NUMBER,
-            FieldName.EWAY_BILL_NUMBER,
-            FieldName.VOUCHER_REFERENCE,
-            FieldName.LR_NUMBER,
-            FieldName.VEHICLE_NUMBER,
-            FieldName.INVOICE_DATE,
-            FieldName.DUE_DATE,
-            FieldName.CHALLAN_DATE,
-            FieldName.EWAY_BILL_DATE,
-            # Amounts and quantities (should be TEXT/NUMBER, not SELECT)
-            FieldName.QUANTITY,
-            FieldName.UNIT_PRICE,
-            FieldName.LINE_TOTAL,
-            FieldName.TOTAL_AMOUNT,
-            FieldName.SUBTOTAL,
-            FieldName.GST_RATE,
-            FieldName.CGST_RATE,
-            FieldName.SGST_RATE,
-            FieldName.IGST_RATE,
-            FieldName.TAXABLE_VALUE,
-            FieldName.CGST_AMOUNT,
-            FieldName.SGST_AMOUNT,
-            FieldName.IGST_AMOUNT,
-            # Other document-specific fields
-            FieldName.HSN_CODE,
-            FieldName.SAC_CODE,
-            FieldName.VENDOR_GSTIN,
-            FieldName.CUSTOMER_GSTIN,
-            FieldName.VENDOR_PAN,
-            FieldName.CUSTOMER_PAN,
-            FieldName.IFSC_CODE,
-            FieldName.UPI_ID,
-        }
+        if source in _TALLY_DATA_SOURCES:
+            return _load_options('field', field_id, source, group_filter, clear_existing)
         
-        # Static option fields that should have predefined values, not Tally data
-        static_option_fields = {
-            FieldName.BILL_TYPE: ['Tax Invoice', 'Bill of Supply', 'Export Invoice', 'Debit Note', 'Credit Note'],
-            FieldName.VOUCHER_TYPE: ['Sales', 'Purchase', 'Receipt', 'Payment', 'Journal', 'Contra'],
-            FieldName.PAYMENT_STATUS: ['Paid', 'Unpaid', 'Partially Paid', 'Overdue'],
-            FieldName.PAYMENT_MODE: ['Cash', 'Cheque', 'NEFT', 'RTGS', 'UPI', 'Card', 'Bank Transfer'],
-            FieldName.CURRENCY: ['INR', 'USD', 'EUR', 'GBP', 'AED', 'SGD'],
-            FieldName.TRANSPORT_MODE: ['Road', 'Rail', 'Air', 'Ship'],
-            FieldName.SUPPLY_TYPE: ['Taxable', 'Non-Taxable', 'Exempt', 'Zero Rated'],
-            FieldName.REVERSE_CHARGE: ['Yes', 'No'],
-            FieldName.IS_EXPORT: ['Yes', 'No'],
-            FieldName.IS_COMPOSITE_SUPPLY: ['Yes', 'No'],
-        }
-        
-        # Check if this field should not auto-load from Tally
-        if field_name in non_tally_fields:
-            logger.info(f"Field {field_name.value} is marked as non-Tally field. Skipping auto-load.")
-            return {
-                'success': True,
-                'message': f'Field {field_name.value} does not require Tally data loading',
-                'options_count': 0,
-                'field_id': field_id,
-                'skip_reason': 'non_tally_field'
-            }
-        
-        # Check if this field should have static options
-        if field_name in static_option_fields:
-            logger.info(f"Loading static options for field {field_name.value}")
-            if clear_existing:
-                FieldOption.query.filter_by(field_id=field_id).delete()
-                db.session.flush()
-            
-            options_created = 0
-            for option_value in static_option_fields[field_name]:
-                option = FieldOption(
-                    field_id=field_id,
-                    option_value=option_value,
-                    option_label=option_value
-                )
-                db.session.add(option)
-                options_created += 1
-            
-            db.session.commit()
-            
-            return {
-                'success': True,
-                'message': f'Successfully loaded {options_created} static options',
-                'options_count': options_created,
-                'field_id': field_id,
-                'data_source': 'static_options'
-            }
-        
-        if field_name in field_mapping:
-            data_type, group_filter = field_mapping[field_name]
-            
-            if data_type == 'companies':
-                return load_companies_as_options(field_id, clear_existing)
-            elif data_type == 'ledgers':
-                return load_ledgers_as_options(field_id, group_filter, clear_existing)
-            elif data_type == 'stock_items':
-                return load_stock_items_as_options(field_id, group_filter, clear_existing)
-            elif data_type == 'units':
-                return load_units_as_options(field_id, clear_existing)
-        
-        # Fallback: check field name string for common patterns (only for very specific cases)
-        field_name_str = field_name.value.lower()
-        
-        # Only load Tally data if the field name strongly suggests it needs specific Tally data
-        if any(keyword in field_name_str for keyword in ['vendor', 'supplier', 'creditor']) and 'name' in field_name_str:
-            return load_ledgers_as_options(field_id, 'Sundry Creditors', clear_existing)
-        elif any(keyword in field_name_str for keyword in ['customer', 'client', 'debtor']) and 'name' in field_name_str:
-            return load_ledgers_as_options(field_id, 'Sundry Debtors', clear_existing)
-        elif any(keyword in field_name_str for keyword in ['item', 'product', 'stock']) and ('description' in field_name_str or 'name' in field_name_str):
-            return load_stock_items_as_options(field_id, None, clear_existing)
-        elif any(keyword in field_name_str for keyword in ['unit', 'uom', 'measure', 'measurement']):
-            return load_units_as_options(field_id, clear_existing)
-        elif 'company' in field_name_str and 'name' in field_name_str:
-            return load_companies_as_options(field_id, clear_existing)
-        else:
-            # Don't auto-load anything for unrecognized fields
-            logger.warning(f"Field {field_name.value} doesn't have a defined Tally data mapping. Skipping auto-load.")
-            return {
-                'success': True,
-                'message': f'Field {field_name.value} does not have a defined Tally data mapping',
-                'options_count': 0,
-                'field_id': field_id,
-                'skip_reason': 'no_mapping_defined'
-            }
+        result = _load_field_from_source(field_id, field_name, source, group_filter, None, clear_existing)
+        db.session.commit()
+        return result
         
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error in auto_load_tally_options for field {field_id}: {e}")
         raise TallyFieldOptionsError(f"Failed to auto-load options: {e}")
 
 
+def _resolve_fields_batch(field_ids: List[int], results: Dict[int, Dict]) -> Dict[int, Tuple]:
+    """
+    Validate template fields with one query and resolve each one's option source.
+    
+    Returns {field_id: (field_name, source, group_filter)}; fields that are missing
+    or not SELECT type get an error entry in `results` instead.
+    """
+    fields = _load_fields_batch(field_ids)
+    resolved = {}
+    for field_id in field_ids:
+        field = fields.get(field_id)
+        if not field:
+            results[field_id] = {'success': False, 'field_id': field_id, 'error': f"Field with ID {field_id} not found"}
+        elif field.field_type != FieldType.SELECT:
+            results[field_id] = {'success': False, 'field_id': field_id, 'error': f"Field {field_id} is not a SELECT type field"}
+        else:
+            resolved[field_id] = (field.field_name,) + _resolve_field_source(field.field_name)
+    return resolved
+
+
+def _load_resolved_fields(resolved: Dict[int, Tuple], datasets: Dict, group_indexes: Dict,
+                          clear_existing: bool, results: Dict[int, Dict]) -> None:
+    """Store options for resolved template fields from pre-fetched Tally data sets without committing."""
+    for field_id, (field_name, source, group_filter) in resolved.items():
+        rows = datasets.get(source)
+        if isinstance(rows, Exception):
+            results[field_id] = {'success': False, 'field_id': field_id, 'error': f"Failed to connect to Tally: {rows}"}
+            continue
+        if rows is not None:
+            rows = _select_group(rows, source, group_filter, group_indexes)
+        results[field_id] = _load_field_from_source(field_id, field_name, source, group_filter, rows, clear_existing)
+
+
+def auto_load_tally_options_for_fields(field_ids: List[int], clear_existing: bool = True) -> Dict[int, Dict]:
+    """
+    Auto-load options for several template fields at once.
+    
+    Fields are grouped by the Tally data set they need, each data set is fetched
+    at most once for the whole batch and all option writes are committed together.
+    Prefer this over calling auto_load_tally_options in a loop; see bulk_refresh to
+    refresh sub-fields in the same transaction.
+    
+    Args:
+        field_ids: IDs of the template fields
+        clear_existing: Whether to clear existing options before loading
+        
+    Returns:
+        Dict mapping each field ID to its result (same shape as auto_load_tally_options).
+        Fields that are missing, not SELECT type, or whose Tally data could not be
+        fetched get {'success': False, 'field_id': ..., 'error': ...}
+        
+    Raises:
+        TallyFieldOptionsError: If the batch fails as a whole (see bulk_refresh)
+    """
+    return bulk_refresh(field_ids, clear_existing=clear_existing)['fields']
+
+
 # Sub-Template Field Options Functions
 def load_stock_items_as_sub_field_options(sub_field_id: int, stock_group: Optional[str] = None, clear_existing: bool = True) -> Dict:
     """
@@ -516,68 +891,7 @@ def load_stock_items_as_sub_field_options(sub_field_id: int, stock_group: Option
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate sub-field exists and is SELECT type
-        sub_field = SubTemplateField.query.get(sub_field_id)
-        if not sub_field:
-            raise TallyFieldOptionsError(f"Sub-field with ID {sub_field_id} not found")
-        
-        if sub_field.data_type != DataType.SELECT:
-            raise TallyFieldOptionsError(f"Sub-field {sub_field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            SubTemplateFieldOption.query.filter_by(sub_temp_field_id=sub_field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch stock items
-        with TallyConnector(version="latest") as tally:
-            stock_items = get_stock_items_list(tally)
-        
-        # Filter by stock group if specified
-        if stock_group:
-            stock_items = [item for item in stock_items if item.get('stock_group', '').lower() == stock_group.lower()]
-        
-        # Create sub-field options from stock items
-        options_created = 0
-        for item in stock_items:
-            # Skip inactive items
-            if not item.get('is_active', True):
-                continue
-                
-            # Use alias if available, otherwise use name
-            display_name = item.get('alias') or item['name']
-            
-            option = SubTemplateFieldOption(
-                sub_temp_field_id=sub_field_id,
-                option_value=item['name'],      # Always use actual name as value
-                option_label=display_name       # Use alias or name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
-        
-        group_filter_msg = f" (filtered by stock group: {stock_group})" if stock_group else ""
-        logger.info(f"Loaded {options_created} stock item options for sub-field {sub_field_id}{group_filter_msg}")
-        
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} stock item options{group_filter_msg}',
-            'options_count': options_created,
-            'sub_field_id': sub_field_id,
-            'stock_group': stock_group
-        }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading stock items for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
-    
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading stock items for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load stock items: {e}")
+    return _load_options('sub_field', sub_field_id, 'stock_items', stock_group, clear_existing)
 
 
 def load_ledgers_as_sub_field_options(sub_field_id: int, ledger_group: Optional[str] = None, clear_existing: bool = True) -> Dict:
@@ -595,68 +909,7 @@ def load_ledgers_as_sub_field_options(sub_field_id: int, ledger_group: Optional[
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate sub-field exists and is SELECT type
-        sub_field = SubTemplateField.query.get(sub_field_id)
-        if not sub_field:
-            raise TallyFieldOptionsError(f"Sub-field with ID {sub_field_id} not found")
-        
-        if sub_field.data_type != DataType.SELECT:
-            raise TallyFieldOptionsError(f"Sub-field {sub_field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            SubTemplateFieldOption.query.filter_by(sub_temp_field_id=sub_field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch ledgers
-        with TallyConnector(version="latest") as tally:
-            ledgers = get_ledgers_list(tally)
-        
-        # Filter by group if specified
-        if ledger_group:
-            ledgers = [l for l in ledgers if l.get('group', '').lower() == ledger_group.lower()]
-        
-        # Create sub-field options from ledgers
-        options_created = 0
-        for ledger in ledgers:
-            # Skip inactive ledgers
-            if not ledger.get('is_active', True):
-                continue
-                
-            # Use alias if available, otherwise use name
-            display_name = ledger.get('alias') or ledger['name']
-            
-            option = SubTemplateFieldOption(
-                sub_temp_field_id=sub_field_id,
-                option_value=ledger['name'],    # Always use actual name as value
-                option_label=display_name       # Use alias or name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
-        
-        group_filter_msg = f" (filtered by group: {ledger_group})" if ledger_group else ""
-        logger.info(f"Loaded {options_created} ledger options for sub-field {sub_field_id}{group_filter_msg}")
-        
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} ledger options{group_filter_msg}',
-            'options_count': options_created,
-            'sub_field_id': sub_field_id,
-            'ledger_group': ledger_group
-        }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading ledgers for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
-    
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading ledgers for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load ledgers: {e}")
+    return _load_options('sub_field', sub_field_id, 'ledgers', ledger_group, clear_existing)
 
 
 def load_units_as_sub_field_options(sub_field_id: int, clear_existing: bool = True) -> Dict:
@@ -673,62 +926,36 @@ def load_units_as_sub_field_options(sub_field_id: int, clear_existing: bool = Tr
     Raises:
         TallyFieldOptionsError: If loading fails
     """
-    try:
-        # Validate sub-field exists and is SELECT type
-        sub_field = SubTemplateField.query.get(sub_field_id)
-        if not sub_field:
-            raise TallyFieldOptionsError(f"Sub-field with ID {sub_field_id} not found")
-        
-        if sub_field.data_type != DataType.SELECT:
-            raise TallyFieldOptionsError(f"Sub-field {sub_field_id} is not a SELECT type field")
-        
-        # Clear existing options if requested
-        if clear_existing:
-            SubTemplateFieldOption.query.filter_by(sub_temp_field_id=sub_field_id).delete()
-            db.session.flush()
-        
-        # Connect to Tally and fetch units
-        with TallyConnector(version="legacy") as tally:
-            units = get_units_list(tally)
-        
-        # Create sub-field options from units
-        options_created = 0
-        for unit in units:
-            # Skip inactive units
-            if not unit.get('is_active', True):
-                continue
-                
-            # Use name for both value and display
-            display_name = unit['name']
-            
-            option = SubTemplateFieldOption(
-                sub_temp_field_id=sub_field_id,
-                option_value=unit['name'],      # Use actual name as value
-                option_label=display_name       # Use name for display
-            )
-            db.session.add(option)
-            options_created += 1
-        
-        db.session.commit()
-        
-        logger.info(f"Loaded {options_created} unit options for sub-field {sub_field_id}")
-        
-        return {
-            'success': True,
-            'message': f'Successfully loaded {options_created} unit options',
-            'options_count': options_created,
-            'sub_field_id': sub_field_id
-        }
-        
-    except TallyConnectorError as e:
-        db.session.rollback()
-        logger.error(f"Tally connection error while loading units for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to connect to Tally: {e}")
+    return _load_options('sub_field', sub_field_id, 'units', None, clear_existing)
+
+
+def _resolve_sub_field_source(field_name: FieldName) -> Tuple[str, Optional[str]]:
+    """Work out which Tally data set (and group filter) supplies a sub-field's options."""
+    mapped = _SUB_FIELD_TALLY_SOURCES.get(field_name)
+    if mapped:
+        return mapped
     
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error loading units for sub-field {sub_field_id}: {e}")
-        raise TallyFieldOptionsError(f"Failed to load units: {e}")
+    # Fallback: check field name string for common patterns
+    hits = _fallback_keyword_hits(field_name)
+    
+    if _KW_ITEM in hits or _KW_DESCRIPTION in hits:
+        return 'stock_items', None
+    elif _KW_UNIT in hits:
+        return 'units', None
+    elif _KW_VENDOR in hits:
+        return 'ledgers', 'Sundry Creditors'
+    elif _KW_CUSTOMER in hits:
+        return 'ledgers', 'Sundry Debtors'
+    
+    # Default to stock items for unknown sub-fields
+    logger.warning("Could not determine Tally data type for sub-field %s, defaulting to stock items", field_name)
+    return 'stock_items', None
+
+
+def _load_sub_field_from_source(sub_field_id: int, source: str, group_filter: Optional[str],
+                                rows: List[Dict], clear_existing: bool) -> Dict:
+    """Store options for a sub-field from an already-fetched Tally data set without committing."""
+    return _load_source_impl('sub_field', sub_field_id, source, rows, group_filter, clear_existing)
 
 
 def auto_load_tally_sub_field_options(sub_field_id: int, clear_existing: bool = True) -> Dict:
@@ -747,91 +974,231 @@ def auto_load_tally_sub_field_options(sub_field_id: int, clear_existing: bool =
     """
     try:
         # Get sub-field information
-        sub_field = SubTemplateField.query.get(sub_field_id)
+        sub_field = _field_query(SubTemplateField, SubTemplateField.data_type, SubTemplateField.field_name).get(sub_field_id)
         if not sub_field:
             raise TallyFieldOptionsError(f"Sub-field with ID {sub_field_id} not found")
         
         if sub_field.data_type != DataType.SELECT:
             raise TallyFieldOptionsError(f"Sub-field {sub_field_id} is not a SELECT type field")
         
-        field_name = sub_field.field_name
-        
-        # Map field names to Tally data types for sub-fields
-        field_mapping = {
-            # Stock item fields
-            FieldName.ITEM_DESCRIPTION: ('stock_items', None),
-            FieldName.ITEM_CODE: ('stock_items', None),
-            
-            # Vendor/Customer fields  
-            FieldName.VENDOR_NAME: ('ledgers', 'Sundry Creditors'),
-            FieldName.CUSTOMER_NAME: ('ledgers', 'Sundry Debtors'),
-            
-            # Unit of measurement fields
-            FieldName.UNIT_OF_MEASUREMENT: ('units', None),
-        }
-        
-        if field_name in field_mapping:
-            data_type, group_filter = field_mapping[field_name]
-            
-            if data_type == 'ledgers':
-                return load_ledgers_as_sub_field_options(sub_field_id, group_filter, clear_existing)
-            elif data_type == 'stock_items':
-                return load_stock_items_as_sub_field_options(sub_field_id, group_filter, clear_existing)
-            elif data_type == 'units':
-                return load_units_as_sub_field_options(sub_field_id, clear_existing)
-        
-        # Fallback: check field name string for common patterns
-        field_name_str = field_name.value.lower()
-        
-        if any(keyword in field_name_str for keyword in ['item', 'product', 'stock', 'description']):
-            return load_stock_items_as_sub_field_options(sub_field_id, None, clear_existing)
-        elif any(keyword in field_name_str for keyword in ['unit', 'uom', 'measure', 'measurement']):
-            return load_units_as_sub_field_options(sub_field_id, clear_existing)
-        elif any(keyword in field_name_str for keyword in ['vendor', 'supplier', 'creditor']):
-            return load_ledgers_as_sub_field_options(sub_field_id, 'Sundry Creditors', clear_existing)
-        elif any(keyword in field_name_str for keyword in ['customer', 'client', 'debtor']):
-            return load_ledgers_as_sub_field_options(sub_field_id, 'Sundry Debtors', clear_existing)
-        else:
-            # Default to stock items for unknown sub-fields
-            logger.warning(f"Could not determine Tally data type for sub-field {field_name}, defaulting to stock items")
-            return load_stock_items_as_sub_field_options(sub_field_id, None, clear_existing)
+        source, group_filter = _resolve_sub_field_source(sub_field.field_name)
+        return _load_options('sub_field', sub_field_id, source, group_filter, clear_existing)
         
     except Exception as e:
         logger.error(f"Error in auto_load_tally_sub_field_options for sub-field {sub_field_id}: {e}")
         raise TallyFieldOptionsError(f"Failed to auto-load sub-field options: {e}")
 
 
-def get_field_options_summary(field_id: int) -> Dict:
+def _resolve_sub_fields_batch(sub_field_ids: List[int], results: Dict[int, Dict]) -> Dict[int, Tuple]:
+    """
+    Validate sub-template fields with one query and resolve each one's Tally data set.
+    
+    Returns {sub_field_id: (source, group_filter)}; sub-fields that are missing or
+    not SELECT type get an error entry in `results` instead.
+    """
+    sub_fields = _load_sub_fields_batch(sub_field_ids)
+    resolved = {}
+    for sub_field_id in sub_field_ids:
+        sub_field = sub_fields.get(sub_field_id)
+        if not sub_field:
+            results[sub_field_id] = {'success': False, 'sub_field_id': sub_field_id, 'error': f"Sub-field with ID {sub_field_id} not found"}
+        elif sub_field.data_type != DataType.SELECT:
+            results[sub_field_id] = {'success': False, 'sub_field_id': sub_field_id, 'error': f"Sub-field {sub_field_id} is not a SELECT type field"}
+        else:
+            resolved[sub_field_id] = _resolve_sub_field_source(sub_field.field_name)
+    return resolved
+
+
+def _load_resolved_sub_fields(resolved: Dict[int, Tuple], datasets: Dict, group_indexes: Dict,
+                              clear_existing: bool, results: Dict[int, Dict]) -> None:
+    """Store options for resolved sub-fields from pre-fetched Tally data sets without committing."""
+    for sub_field_id, (source, group_filter) in resolved.items():
+        rows = datasets[source]
+        if isinstance(rows, Exception):
+            results[sub_field_id] = {'success': False, 'sub_field_id': sub_field_id, 'error': f"Failed to connect to Tally: {rows}"}
+            continue
+        rows = _select_group(rows, source, group_filter, group_indexes)
+        results[sub_field_id] = _load_sub_field_from_source(sub_field_id, source, group_filter, rows, clear_existing)
+
+
+def auto_load_tally_sub_field_options_for_fields(sub_field_ids: List[int], clear_existing: bool = True) -> Dict[int, Dict]:
+    """
+    Auto-load options for several sub-template fields at once.
+    
+    Sub-fields are fetched in one query, each Tally data set is fetched at most
+    once for the whole batch and all option writes are committed together.
+    
+    Args:
+        sub_field_ids: IDs of the sub-template fields
+        clear_existing: Whether to clear existing options before loading
+        
+    Returns:
+        Dict mapping each sub-field ID to its result (same shape as
+        auto_load_tally_sub_field_options), or to {'success': False, ...} on failure
+        
+    Raises:
+        TallyFieldOptionsError: If the batch fails as a whole (see bulk_refresh)
+    """
+    return bulk_refresh([], sub_field_ids, clear_existing)['sub_fields']
+
+
+def bulk_refresh(field_ids: List[int], sub_field_ids: List[int] = (), clear_existing: bool = True) -> Dict[str, Dict[int, Dict]]:
+    """
+    Refresh options for many template fields and sub-fields in one transaction.
+    
+    Controllers refreshing more than one field should use this (or the
+    auto_load_*_for_fields wrappers) rather than the single-field loaders, which
+    each commit. Fields and sub-fields are validated with one query per model,
+    each Tally data set is fetched once across both, and everything is committed once.
+    
+    Args:
+        field_ids: IDs of the template fields
+        sub_field_ids: IDs of the sub-template fields
+        clear_existing: Whether to clear existing options before loading
+        
+    Returns:
+        {'fields': {field_id: result}, 'sub_fields': {sub_field_id: result}} where each
+        result has the shape of the matching auto_load_* function, or
+        {'success': False, ..., 'error': ...} for IDs that could not be loaded
+        
+    Raises:
+        TallyFieldOptionsError: If the fields cannot be looked up, the Tally host cannot be
+            resolved or storing the options fails (nothing is committed)
+    """
+    results = {'fields': {}, 'sub_fields': {}}
+    
+    try:
+        # Resolve everything up front so each Tally data set is fetched only once
+        resolved_fields = _resolve_fields_batch(field_ids, results['fields']) if field_ids else {}
+        resolved_sub_fields = _resolve_sub_fields_batch(sub_field_ids, results['sub_fields']) if sub_field_ids else {}
+        
+        sources = {source for _, source, _ in resolved_fields.values() if source in _TALLY_DATA_SOURCES}
+        sources.update(source for source, _ in resolved_sub_fields.values())
+        datasets = _fetch_tally_datasets(sources)
+        group_indexes = {}
+        
+        _load_resolved_fields(resolved_fields, datasets, group_indexes, clear_existing, results['fields'])
+        _load_resolved_sub_fields(resolved_sub_fields, datasets, group_indexes, clear_existing, results['sub_fields'])
+        db.session.commit()
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error refreshing options for fields {field_ids} and sub-fields {list(sub_field_ids)}: {e}")
+        raise TallyFieldOptionsError(f"Failed to refresh options: {e}")
+    
+    return results
+
+
+def _option_row_dict(row) -> Dict:
+    """FieldOption.to_dict() shape built from a plain column row."""
+    return {
+        'options_id': row.options_id,
+        'field_id': row.field_id,
+        'option_value': row.option_value,
+        'option_label': row.option_label,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'updated_at': row.updated_at.isoformat() if row.updated_at else None
+    }
+
+
+def _options_summary(field: TemplateField, options_count: int, last_updated: Optional[datetime]) -> Dict:
+    """Summary dict shared by get_field_options_summary and get_field_options_summaries."""
+    return {
+        'field_id': field.field_id,
+        'field_name': field.field_name.value,
+        'field_type': field.field_type.value,
+        'options_count': options_count,
+        'last_updated': last_updated.isoformat() if last_updated else None
+    }
+
+
+def get_field_options_summary(field_id: int, include_options: bool = True) -> Dict:
     """
     Get a summary of current options for a field.
     
     Args:
         field_id: ID of the template field
+        include_options: Whether to include the option rows themselves. Without them
+            the count and last-updated time are computed in SQL; with them they are
+            taken from the fetched rows, saving the aggregate query
         
     Returns:
         Dict with field information and options summary
     """
     try:
-        field = TemplateField.query.get(field_id)
+        field = _field_query(TemplateField, TemplateField.field_type, TemplateField.field_name).get(field_id)
         if not field:
             return {'error': f"Field with ID {field_id} not found"}
         
-        options = FieldOption.query.filter_by(field_id=field_id).all()
+        if not include_options:
+            options_count, last_updated = db.session.execute(
+                select(func.count(), func.max(FieldOption.updated_at)).where(FieldOption.field_id == field_id)
+            ).one()
+            return _options_summary(field, options_count, last_updated)
         
-        return {
-            'field_id': field_id,
-            'field_name': field.field_name.value,
-            'field_type': field.field_type.value,
-            'options_count': len(options),
-            'options': [option.to_dict() for option in options],
-            'last_updated': max([opt.updated_at for opt in options]).isoformat() if options else None
-        }
+        # Plain column rows (same keys as FieldOption.to_dict) skip ORM hydration
+        # and identity-map churn on this read-only path
+        rows = db.session.execute(_FIELD_OPTIONS_SUMMARY_STMT, {'field_id': field_id}).all()
+        last_updated = max((row.updated_at for row in rows if row.updated_at), default=None)
+        
+        summary = _options_summary(field, len(rows), last_updated)
+        summary['options'] = [_option_row_dict(row) for row in rows]
+        return summary
         
     except Exception as e:
         logger.error(f"Error getting options summary for field {field_id}: {e}")
         return {'error': f"Failed to get options summary: {e}"}
 
 
+def get_field_options_summaries(field_ids: List[int], include_options: bool = False) -> Dict[int, Dict]:
+    """
+    Get options summaries for several fields with a fixed number of queries.
+    
+    Args:
+        field_ids: IDs of the template fields
+        include_options: Whether to include the option rows themselves
+        
+    Returns:
+        Dict mapping each field ID to its summary (same shape as get_field_options_summary)
+    """
+    try:
+        fields = _load_fields_batch(field_ids)
+        summaries = {
+            field_id: {'error': f"Field with ID {field_id} not found"}
+            for field_id in field_ids if field_id not in fields
+        }
+        if not fields:
+            return summaries
+        
+        aggregates = {
+            field_id: (options_count, last_updated)
+            for field_id, options_count, last_updated in db.session.execute(
+                select(FieldOption.field_id, func.count(), func.max(FieldOption.updated_at))
+                .where(FieldOption.field_id.in_(fields))
+                .group_by(FieldOption.field_id)
+            )
+        }
+        for field_id, field in fields.items():
+            summaries[field_id] = _options_summary(field, *aggregates.get(field_id, (0, None)))
+        
+        if include_options:
+            for field_id in fields:
+                summaries[field_id]['options'] = []
+            rows = db.session.execute(
+                select(*_FIELD_OPTIONS_SUMMARY_STMT.selected_columns)
+                .where(FieldOption.field_id.in_(fields))
+                .order_by(FieldOption.options_id)
+            )
+            for row in rows:
+                summaries[row.field_id]['options'].append(_option_row_dict(row))
+        
+        return summaries
+        
+    except Exception as e:
+        logger.error(f"Error getting options summaries for fields {field_ids}: {e}")
+        return {field_id: {'error': f"Failed to get options summary: {e}"} for field_id in field_ids}
+
+
 def refresh_field_options(field_id: int) -> Dict:
     """
     Refresh field options by reloading from Tally using auto-detection.
@@ -7,12 +7,71 @@ Helper functions for data transformation, validation, and mapping between OCR da
 import logging
 import re
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Optional, Tuple, Any
 
+from ..utils.data_conversion import match_date_formats
 from .config import TallyConfig
 
 logger = logging.getLogger(__name__)
 
+# Date formats accepted for voucher dates, in priority order
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y",
+    "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S"
+)
+
+# Voucher type for each document type (anything else becomes a Sales voucher)
+_VOUCHER_TYPE_MAP = MappingProxyType({
+    "invoice": "Sales",
+    "bill": "Purchase",
+    "receipt": "Receipt",
+    "payment": "Payment"
+})
+
+# Common prefixes/suffixes that might cause mismatches when matching party names to ledgers
+_PARTY_PREFIXES = ('M/s', 'M/S', 'Ms.', 'Mr.', 'Mrs.')
+_PARTY_SUFFIXES = ('Pvt Ltd', 'Private Limited', 'Ltd', 'Inc', 'Corp')
+
+# Each prefix (in order) and each suffix (checked from the end, in order) is stripped at
+# most once, one optional group apiece, so a single match removes the same stack of
+# affixes as checking them one by one
+_PARTY_PREFIX_RE = re.compile(''.join(rf'(?:{re.escape(prefix)}\s*)?' for prefix in _PARTY_PREFIXES))
+_PARTY_SUFFIX_RE = re.compile(''.join(rf'(?:\s*{re.escape(suffix)})?' for suffix in reversed(_PARTY_SUFFIXES)) + r'$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Candidate OCR keys for each voucher header field, in priority order. Top-level keys are
+# searched for every field; the nested "header" dict only for party, date and number
+_HEADER_FIELD_CANDIDATES = MappingProxyType({
+    "party_name": ("party_name", "customer_name", "supplier_name", "vendor_name", "bill_to", "sold_to"),
+    "date": ("date", "invoice_date", "bill_date", "document_date", "issue_date"),
+    "voucher_number": ("voucher_number", "invoice_number", "bill_number", "document_number", "ref_number"),
+    "narration": ("narration", "description", "remarks", "notes"),
+    "bill_ref": ("bill_ref", "reference", "ref_number", "po_number"),
+})
+_NESTED_HEADER_FIELDS = frozenset({"party_name", "date", "voucher_number"})
+
+# Line item keys, in priority order
+_LINE_ITEMS_KEYS = ("items", "line_items", "products", "details")
+_ITEM_NAME_KEYS = ("product_name", "item_name", "description")
+_ITEM_QTY_KEYS = ("quantity", "qty")
+_ITEM_RATE_KEYS = ("rate", "price", "unit_price")
+_ITEM_UNIT_KEYS = ("unit", "uom")
+_ITEM_AMOUNT_KEYS = ("amount", "total")
+
+
+def _build_header_field_routes() -> Dict[str, Tuple[Tuple[str, int], ...]]:
+    """Invert _HEADER_FIELD_CANDIDATES: OCR key -> ((header field, priority), ...)."""
+    routes = {}
+    for field, candidates in _HEADER_FIELD_CANDIDATES.items():
+        for rank, key in enumerate(candidates):
+            routes.setdefault(key, []).append((field, rank))
+    return MappingProxyType({key: tuple(targets) for key, targets in routes.items()})
+
+
+_HEADER_FIELD_ROUTES = _build_header_field_routes()
+
 
 def ocr_data_to_voucher_format(ocr_data: Dict, document_type: str = "invoice") -> Dict:
     """
@@ -30,23 +89,12 @@ def ocr_data_to_voucher_format(ocr_data: Dict, document_type: str = "invoice") -
     """
     try:
         # Determine voucher type based on document type
-        voucher_type_map = {
-            "invoice": "Sales",
-            "bill": "Purchase", 
-            "receipt": "Receipt",
-            "payment": "Payment"
-        }
-        
-        voucher_type = voucher_type_map.get(document_type.lower(), "Sales")
+        voucher_type = _VOUCHER_TYPE_MAP.get(document_type.lower(), "Sales")
         
         # Extract basic voucher information
         voucher_data = {
             "voucher_type": voucher_type,
-            "party_name": _extract_party_name(ocr_data),
-            "date": _extract_date(ocr_data),
-            "voucher_number": _extract_voucher_number(ocr_data),
-            "narration": _extract_narration(ocr_data, document_type),
-            "bill_ref": _extract_bill_reference(ocr_data),
+            **_extract_header_fields(ocr_data, document_type),
             "items": _extract_line_items(ocr_data)
         }
         
@@ -87,11 +135,9 @@ def validate_voucher_data(voucher_data: Dict) -> Tuple[bool, List[str]]:
         errors.append("Party name must be at least 2 characters")
     
     # Validate date
-    try:
-        if voucher_data.get("date"):
-            _parse_date_string(voucher_data["date"])
-    except ValueError as e:
-        errors.append(f"Invalid date format: {e}")
+    date_value = voucher_data.get("date")
+    if date_value and _try_parse_date(date_value) is None:
+        errors.append(f"Invalid date format: Unable to parse date: {date_value}")
     
     # Validate items
     items = voucher_data.get("items", [])
@@ -111,10 +157,14 @@ def validate_voucher_data(voucher_data: Dict) -> Tuple[bool, List[str]]:
     return is_valid, errors
 
 
+@lru_cache(maxsize=8192)
 def normalize_party_name(party_name: str) -> str:
     """
     Standardize party names for matching with existing ledgers.
     
+    Memoised: the same vendors/customers recur across documents, and the result
+    depends only on the input string.
+    
     Args:
         party_name: Raw party name from OCR
         
@@ -125,19 +175,11 @@ def normalize_party_name(party_name: str) -> str:
         return ""
     
     # Remove extra whitespace
-    normalized = re.sub(r'\s+', ' ', party_name.strip())
+    normalized = _WHITESPACE_RE.sub(' ', party_name.strip())
     
     # Remove common prefixes/suffixes that might cause mismatches
-    prefixes_to_remove = ['M/s', 'M/S', 'Ms.', 'Mr.', 'Mrs.']
-    suffixes_to_remove = ['Pvt Ltd', 'Private Limited', 'Ltd', 'Inc', 'Corp']
-    
-    for prefix in prefixes_to_remove:
-        if normalized.startswith(prefix):
-            normalized = normalized[len(prefix):].strip()
-    
-    for suffix in suffixes_to_remove:
-        if normalized.endswith(suffix):
-            normalized = normalized[:-len(suffix)].strip()
+    normalized = _PARTY_PREFIX_RE.sub('', normalized, count=1)
+    normalized = _PARTY_SUFFIX_RE.sub('', normalized, count=1).strip()
     
     # Title case for consistency
     normalized = normalized.title()
@@ -156,116 +198,80 @@ def calculate_voucher_totals(line_items: List[Dict]) -> Dict:
     Returns:
         Dictionary containing calculated totals
     """
-    totals = {
-        "subtotal": 0.0,
-        "tax_amount": 0.0,
-        "discount_amount": 0.0,
-        "total_amount": 0.0,
-        "total_quantity": 0.0
-    }
+    # Accumulate in locals rather than read-modify-write dict entries per item
+    subtotal = tax_total = discount_total = total_quantity = 0.0
     
     for item in line_items:
-        qty = float(item.get("qty", 0))
-        rate = float(item.get("rate", 0))
-        amount = float(item.get("amount", qty * rate))
+        get = item.get
+        qty = float(get("qty", 0))
+        rate = float(get("rate", 0))
+        amount = float(get("amount", qty * rate))
         
-        totals["subtotal"] += amount
-        totals["total_quantity"] += qty
+        subtotal += amount
+        total_quantity += qty
         
         # Add tax if present
-        tax_amount = float(item.get("tax_amount", 0))
-        totals["tax_amount"] += tax_amount
+        tax_total += float(get("tax_amount", 0))
         
         # Add discount if present
-        discount = float(item.get("discount", 0))
-        totals["discount_amount"] += discount
-    
-    # Calculate final total
-    totals["total_amount"] = totals["subtotal"] + totals["tax_amount"] - totals["discount_amount"]
-    
-    return totals
-
-
-def _extract_party_name(ocr_data: Dict) -> str:
-    """Extract party name from OCR data."""
-    # Try different possible field names
-    party_fields = ["party_name", "customer_name", "supplier_name", "vendor_name", "bill_to", "sold_to"]
-    
-    for field in party_fields:
-        if field in ocr_data and ocr_data[field]:
-            return normalize_party_name(str(ocr_data[field]))
-    
-    # If not found in direct fields, try nested structures
-    if "header" in ocr_data:
-        for field in party_fields:
-            if field in ocr_data["header"] and ocr_data["header"][field]:
-                return normalize_party_name(str(ocr_data["header"][field]))
-    
-    return ""
-
-
-def _extract_date(ocr_data: Dict) -> str:
-    """Extract date from OCR data."""
-    date_fields = ["date", "invoice_date", "bill_date", "document_date", "issue_date"]
-    
-    for field in date_fields:
-        if field in ocr_data and ocr_data[field]:
-            return str(ocr_data[field])
-    
-    # Try nested structures
-    if "header" in ocr_data:
-        for field in date_fields:
-            if field in ocr_data["header"] and ocr_data["header"][field]:
-                return str(ocr_data["header"][field])
-    
-    # Default to current date if not found
-    return datetime.now().strftime("%Y-%m-%d")
+        discount_total += float(get("discount", 0))
+    
+    return {
+        "subtotal": subtotal,
+        "tax_amount": tax_total,
+        "discount_amount": discount_total,
+        # Calculate final total
+        "total_amount": subtotal + tax_total - discount_total,
+        "total_quantity": total_quantity
+    }
 
 
-def _extract_voucher_number(ocr_data: Dict) -> Optional[str]:
-    """Extract voucher/invoice number from OCR data."""
-    number_fields = ["voucher_number", "invoice_number", "bill_number", "document_number", "ref_number"]
-    
-    for field in number_fields:
-        if field in ocr_data and ocr_data[field]:
-            return str(ocr_data[field])
-    
-    # Try nested structures
-    if "header" in ocr_data:
-        for field in number_fields:
-            if field in ocr_data["header"] and ocr_data["header"][field]:
-                return str(ocr_data["header"][field])
-    
-    return None
+def _scan_header_fields(mapping: Dict, fields, found: Dict) -> None:
+    """Record in `found` the best-priority non-empty value for each of `fields` present in `mapping`."""
+    for key, value in mapping.items():
+        if not value:
+            continue
+        for field, rank in _HEADER_FIELD_ROUTES.get(key, ()):
+            if field in fields and (field not in found or rank < found[field][0]):
+                found[field] = (rank, value)
 
 
-def _extract_narration(ocr_data: Dict, document_type: str) -> str:
-    """Extract or generate narration for the voucher."""
-    # Try to find existing narration
-    narration_fields = ["narration", "description", "remarks", "notes"]
+def _extract_header_fields(ocr_data: Dict, document_type: str) -> Dict:
+    """
+    Extract party name, date, voucher number, narration and bill reference from OCR data.
     
-    for field in narration_fields:
-        if field in ocr_data and ocr_data[field]:
-            return str(ocr_data[field])
+    Walks the top-level keys once (and the nested "header" dict once, for party, date
+    and number fields still missing), picking each field's highest-priority candidate key.
+    """
+    found = {}
+    _scan_header_fields(ocr_data, _HEADER_FIELD_CANDIDATES, found)
     
-    # Generate default narration
-    voucher_num = _extract_voucher_number(ocr_data)
-    if voucher_num:
-        return f"{document_type.title()} {voucher_num} - OCR Import"
+    # If not found in direct fields, try nested structures
+    header = ocr_data.get("header")
+    if isinstance(header, dict):
+        missing = _NESTED_HEADER_FIELDS.difference(found)
+        if missing:
+            _scan_header_fields(header, missing, found)
+    
+    values = {field: str(value) for field, (_, value) in found.items()}
+    voucher_number = values.get("voucher_number")
+    
+    if "narration" in values:
+        narration = values["narration"]
+    elif voucher_number:
+        narration = f"{document_type.title()} {voucher_number} - OCR Import"
     else:
-        return f"{document_type.title()} - OCR Import"
-
-
-def _extract_bill_reference(ocr_data: Dict) -> Optional[str]:
-    """Extract bill reference for bill allocations."""
-    ref_fields = ["bill_ref", "reference", "ref_number", "po_number"]
-    
-    for field in ref_fields:
-        if field in ocr_data and ocr_data[field]:
-            return str(ocr_data[field])
-    
-    # Use voucher number as bill reference if available
-    return _extract_voucher_number(ocr_data)
+        narration = f"{document_type.title()} - OCR Import"
+    
+    return {
+        "party_name": normalize_party_name(values["party_name"]) if "party_name" in values else "",
+        # Default to current date if not found
+        "date": values["date"] if "date" in values else datetime.now().strftime("%Y-%m-%d"),
+        "voucher_number": voucher_number,
+        "narration": narration,
+        # Use voucher number as bill reference if none is given
+        "bill_ref": values["bill_ref"] if "bill_ref" in values else voucher_number
+    }
 
 
 def _extract_line_items(ocr_data: Dict) -> List[Dict]:
@@ -273,9 +279,7 @@ def _extract_line_items(ocr_data: Dict) -> List[Dict]:
     items = []
     
     # Try different possible structures for line items
-    line_items_fields = ["items", "line_items", "products", "details"]
-    
-    for field in line_items_fields:
+    for field in _LINE_ITEMS_KEYS:
         if field in ocr_data and isinstance(ocr_data[field], list):
             for item in ocr_data[field]:
                 processed_item = _process_line_item(item)
@@ -286,20 +290,35 @@ def _extract_line_items(ocr_data: Dict) -> List[Dict]:
     return items
 
 
+def _pick(item: Dict, keys: Tuple[str, ...], default: Any) -> Any:
+    """Equivalent of `item.get(k1) or ... or item.get(kN, default)` over a key tuple."""
+    get = item.get
+    for key in keys:
+        value = get(key)
+        if value:
+            return value
+    return get(keys[-1], default)
+
+
+def _as_float(value: Any) -> float:
+    """float(value), skipping the call when the value is already a float."""
+    return value if type(value) is float else float(value)
+
+
 def _process_line_item(item: Dict) -> Optional[Dict]:
     """Process individual line item."""
     try:
         # Extract item details
-        stock_item = item.get("product_name") or item.get("item_name") or item.get("description", "")
+        stock_item = _pick(item, _ITEM_NAME_KEYS, "")
         if not stock_item:
             return None
         
-        qty = float(item.get("quantity") or item.get("qty", 1))
-        rate = float(item.get("rate") or item.get("price") or item.get("unit_price", 0))
-        unit = item.get("unit") or item.get("uom", TallyConfig.DEFAULT_UNIT)
+        qty = _as_float(_pick(item, _ITEM_QTY_KEYS, 1))
+        rate = _as_float(_pick(item, _ITEM_RATE_KEYS, 0))
+        unit = _pick(item, _ITEM_UNIT_KEYS, TallyConfig.DEFAULT_UNIT)
         
         # Calculate amount if not provided
-        amount = float(item.get("amount") or item.get("total", qty * rate))
+        amount = _as_float(_pick(item, _ITEM_AMOUNT_KEYS, qty * rate))
         
         processed = {
             "stock_item": stock_item.strip(),
@@ -330,14 +349,14 @@ def _validate_item(item: Dict, index: int) -> List[str]:
         errors.append(f"Item {index + 1}: Missing stock item name")
     
     try:
-        qty = float(item.get("qty", 0))
+        qty = _as_float(item.get("qty", 0))
         if qty <= 0:
             errors.append(f"Item {index + 1}: Quantity must be greater than 0")
     except (ValueError, TypeError):
         errors.append(f"Item {index + 1}: Invalid quantity")
     
     try:
-        rate = float(item.get("rate", 0))
+        rate = _as_float(item.get("rate", 0))
         if rate < 0:
             errors.append(f"Item {index + 1}: Rate cannot be negative")
     except (ValueError, TypeError):
@@ -346,20 +365,6 @@ def _validate_item(item: Dict, index: int) -> List[str]:
     return errors
 
 
-def _parse_date_string(date_str: str) -> datetime:
-    """Parse date string with multiple format support."""
-    if not date_str:
-        raise ValueError("Empty date string")
-    
-    formats = [
-        "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y",
-        "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str.strip(), fmt)
-        except ValueError:
-            continue
-    
-    raise ValueError(f"Unable to parse date: {date_str}")
+def _try_parse_date(date_str: str) -> Optional[datetime]:
+    """Parse date string with multiple format support, returning None if no format matches."""
+    return match_date_formats(date_str.strip(), _DATE_FORMATS)
@@ -15,9 +15,11 @@ based on field configurations in templates.
 
 import logging
 import re
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any, Union, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Union, Optional, Tuple
 
 from .enums import FieldType, DataType
 
@@ -29,6 +31,62 @@ class DataConversionError(Exception):
     pass
 
 
+# Common date formats to try, in priority order (ambiguous day/month dates are day-first)
+DATE_FORMATS = (
+    '%Y-%m-%d',          # 2024-01-15
+    '%d/%m/%Y',          # 15/01/2024
+    '%m/%d/%Y',          # 01/15/2024
+    '%d-%m-%Y',          # 15-01-2024
+    '%m-%d-%Y',          # 01-15-2024
+    '%d-%b-%Y',          # 24-Jun-2025
+    '%d-%B-%Y',          # 24-June-2025
+    '%d.%m.%Y',          # 15.01.2024
+    '%Y/%m/%d',          # 2024/01/15
+    '%B %d, %Y',         # January 15, 2024
+    '%b %d, %Y',         # Jan 15, 2024
+    '%d %B %Y',          # 15 January 2024
+    '%d %b %Y',          # 15 Jan 2024
+    '%Y-%m-%d %H:%M:%S', # 2024-01-15 14:30:00
+    '%d/%m/%Y %H:%M',    # 15/01/2024 14:30
+)
+
+
+def _convert_text(str_value: str) -> str:
+    # TEXT/STRING and SELECT fields remain as strings (mapping is handled separately)
+    return str_value
+
+
+def _convert_number(str_value: str) -> Union[int, float]:
+    # Try integer first, then float
+    if '.' in str_value or 'e' in str_value.lower():
+        return float(str_value.replace(',', ''))
+    return int(str_value.replace(',', ''))
+
+
+def _convert_integer(str_value: str) -> int:
+    return int(str_value.replace(',', ''))
+
+
+def _convert_float(str_value: str) -> float:
+    return float(str_value.replace(',', ''))
+
+
+def _convert_date(str_value: str) -> str:
+    # Parse to datetime but return as human-readable string for frontend
+    parsed_date = parse_date_string(str_value)
+    if parsed_date:
+        # Return in DD/MM/YYYY format for frontend compatibility
+        return parsed_date.strftime("%d/%m/%Y")
+    return str_value  # Return original if parsing fails
+
+
+def _convert_email(str_value: str) -> str:
+    # Validate basic email format
+    if '@' not in str_value or '.' not in str_value:
+        raise DataConversionError(f"Invalid email format: {str_value}")
+    return str_value.lower()
+
+
 def convert_template_field_value(value: Any, field_type: FieldType, field_name: str = "") -> Any:
     """
     Convert a value to the appropriate Python type based on TemplateField.field_type
@@ -46,49 +104,29 @@ def convert_template_field_value(value: Any, field_type: FieldType, field_name:
     """
     if value is None or (isinstance(value, str) and value.strip() == ""):
         return None
+    
+    if field_type is FieldType.TABLE:
+        # Tables are handled separately, return as-is
+        return value
+    
+    # Values already typed upstream skip the string round trip (bool is not a number here)
+    if not isinstance(value, (str, bool)):
+        if field_type is FieldType.NUMBER and isinstance(value, (int, float)):
+            return value
+        if field_type is FieldType.DATE and isinstance(value, date):
+            return value.strftime("%d/%m/%Y")
+        if field_type is FieldType.CURRENCY and isinstance(value, Decimal):
+            return value
         
     try:
         # Convert to string first for consistent processing
         str_value = str(value).strip()
         
-        if field_type == FieldType.TEXT:
-            return str_value
-            
-        elif field_type == FieldType.SELECT:
-            # SELECT fields remain as strings (mapping is handled separately)
-            return str_value
-            
-        elif field_type == FieldType.NUMBER:
-            # Try integer first, then float
-            if '.' in str_value or 'e' in str_value.lower():
-                return float(str_value.replace(',', ''))
-            else:
-                return int(str_value.replace(',', ''))
-                
-        elif field_type == FieldType.DATE:
-            # Parse to datetime but return as human-readable string for frontend
-            parsed_date = parse_date_string(str_value)
-            if parsed_date:
-                # Return in DD/MM/YYYY format for frontend compatibility
-                return parsed_date.strftime("%d/%m/%Y")
-            return str_value  # Return original if parsing fails
-            
-        elif field_type == FieldType.EMAIL:
-            # Validate basic email format
-            if '@' not in str_value or '.' not in str_value:
-                raise DataConversionError(f"Invalid email format: {str_value}")
-            return str_value.lower()
-            
-        elif field_type == FieldType.CURRENCY:
-            return parse_currency_string(str_value)
-            
-        elif field_type == FieldType.TABLE:
-            # Tables are handled separately, return as-is
-            return value
-            
-        else:
+        converter = _TEMPLATE_CONVERTERS.get(field_type)
+        if converter is None:
             logger.warning(f"Unknown field type {field_type}, returning as string")
             return str_value
+        return converter(str_value)
             
     except (ValueError, TypeError, InvalidOperation) as e:
         error_msg = f"Failed to convert '{value}' to {field_type.value}"
@@ -115,38 +153,28 @@ def convert_sub_template_field_value(value: Any, data_type: DataType, field_name
     """
     if value is None or (isinstance(value, str) and value.strip() == ""):
         return None
+    
+    # Values already typed upstream skip the string round trip
+    if not isinstance(value, str):
+        if isinstance(value, bool):
+            if data_type is DataType.BOOLEAN:
+                return value
+        elif data_type is DataType.INTEGER and isinstance(value, int):
+            return value
+        elif data_type is DataType.FLOAT and isinstance(value, (int, float)):
+            return float(value)
+        elif data_type is DataType.DATE and isinstance(value, date):
+            return value.strftime("%d/%m/%Y")
         
     try:
         # Convert to string first for consistent processing
         str_value = str(value).strip()
         
-        if data_type == DataType.STRING:
-            return str_value
-            
-        elif data_type == DataType.SELECT:
-            # SELECT fields remain as strings (mapping is handled separately)
-            return str_value
-            
-        elif data_type == DataType.INTEGER:
-            return int(str_value.replace(',', ''))
-            
-        elif data_type == DataType.FLOAT:
-            return float(str_value.replace(',', ''))
-            
-        elif data_type == DataType.DATE:
-            # Parse to datetime but return as human-readable string for frontend
-            parsed_date = parse_date_string(str_value)
-            if parsed_date:
-                # Return in DD/MM/YYYY format for frontend compatibility
-                return parsed_date.strftime("%d/%m/%Y")
-            return str_value  # Return original if parsing fails
-            
-        elif data_type == DataType.BOOLEAN:
-            return parse_boolean_string(str_value)
-            
-        else:
+        converter = _SUB_TEMPLATE_CONVERTERS.get(data_type)
+        if converter is None:
             logger.warning(f"Unknown data type {data_type}, returning as string")
             return str_value
+        return converter(str_value)
             
     except (ValueError, TypeError, InvalidOperation) as e:
         error_msg = f"Failed to convert '{value}' to {data_type.value}"
@@ -156,6 +184,86 @@ def convert_sub_template_field_value(value: Any, data_type: DataType, field_name
         raise DataConversionError(error_msg)
 
 
+# Accepted spellings of boolean values (compared lower-cased)
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'y', 'on', 'enable', 'enabled', 'active'})
+_FALSE_VALUES = frozenset({'false', '0', 'no', 'n', 'off', 'disable', 'disabled', 'inactive'})
+
+# All-numeric dates: year first (group 1-4) or year last (group 5-8), one separator used twice
+_NUMERIC_DATE_RE = re.compile(r'(\d{4})([-/])(\d{1,2})\2(\d{1,2})|(\d{1,2})([-/.])(\d{1,2})\6(\d{4})')
+
+# Numeric strptime formats the regex can stand in for -> (field order, separator)
+_NUMERIC_DATE_FORMATS = {
+    '%Y-%m-%d': ('ymd', '-'),
+    '%Y/%m/%d': ('ymd', '/'),
+    '%d/%m/%Y': ('dmy', '/'),
+    '%m/%d/%Y': ('mdy', '/'),
+    '%d-%m-%Y': ('dmy', '-'),
+    '%m-%d-%Y': ('mdy', '-'),
+    '%d.%m.%Y': ('dmy', '.'),
+}
+
+
+def _match_numeric_date(date_str: str, formats: Tuple[str, ...]) -> Optional[datetime]:
+    """
+    Parse an all-numeric date with one regex match instead of a strptime attempt per format.
+    
+    Walks `formats` in order like the strptime loop, but only the numeric formats with
+    the separator and year position found in the string can match, and each is checked
+    with integer arithmetic.
+    """
+    match = _NUMERIC_DATE_RE.fullmatch(date_str)
+    if not match:
+        return None
+    
+    if match.group(1):
+        year_first, separator = True, match.group(2)
+        year, first, second = int(match.group(1)), int(match.group(3)), int(match.group(4))
+    else:
+        year_first, separator = False, match.group(6)
+        first, second, year = int(match.group(5)), int(match.group(7)), int(match.group(8))
+    
+    for date_format in formats:
+        spec = _NUMERIC_DATE_FORMATS.get(date_format)
+        if not spec or spec[1] != separator or (spec[0] == 'ymd') != year_first:
+            continue
+        month, day = (second, first) if spec[0] == 'dmy' else (first, second)
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def match_date_formats(date_str: str, formats: Tuple[str, ...] = DATE_FORMATS) -> Optional[datetime]:
+    """
+    Parse a date string with the first matching strptime format.
+    
+    Results are cached per (string, formats): OCR batches repeat the same dates
+    (e.g. an invoice date on every line) and strptime is slow. Formats are always
+    tried in the given order, so ambiguous dates resolve the same way on every call.
+    Plain numeric dates are decoded by a single regex match; strptime is only
+    tried for everything else (month names, times).
+    
+    Args:
+        date_str: Stripped date string
+        formats: strptime formats in priority order
+        
+    Returns:
+        datetime object, or None if no format matches
+    """
+    parsed = _match_numeric_date(date_str, formats)
+    if parsed is not None:
+        return parsed
+    
+    for date_format in formats:
+        try:
+            return datetime.strptime(date_str, date_format)
+        except ValueError:
+            continue
+    return None
+
+
 def parse_date_string(date_str: str) -> datetime:
     """
     Parse various date formats into datetime object
@@ -172,30 +280,9 @@ def parse_date_string(date_str: str) -> datetime:
     # Clean the date string
     date_str = date_str.strip()
     
-    # Common date formats to try
-    date_formats = [
-        '%Y-%m-%d',          # 2024-01-15
-        '%d/%m/%Y',          # 15/01/2024
-        '%m/%d/%Y',          # 01/15/2024
-        '%d-%m-%Y',          # 15-01-2024
-        '%m-%d-%Y',          # 01-15-2024
-        '%d-%b-%Y',          # 24-Jun-2025
-        '%d-%B-%Y',          # 24-June-2025
-        '%d.%m.%Y',          # 15.01.2024
-        '%Y/%m/%d',          # 2024/01/15
-        '%B %d, %Y',         # January 15, 2024
-        '%b %d, %Y',         # Jan 15, 2024
-        '%d %B %Y',          # 15 January 2024
-        '%d %b %Y',          # 15 Jan 2024
-        '%Y-%m-%d %H:%M:%S', # 2024-01-15 14:30:00
-        '%d/%m/%Y %H:%M',    # 15/01/2024 14:30
-    ]
-    
-    for date_format in date_formats:
-        try:
-            return datetime.strptime(date_str, date_format)
-        except ValueError:
-            continue
+    parsed = match_date_formats(date_str)
+    if parsed is not None:
+        return parsed
     
     # Try to parse ISO format with timezone
     try:
@@ -206,6 +293,10 @@ def parse_date_string(date_str: str) -> datetime:
     raise DataConversionError(f"Unable to parse date: '{date_str}'")
 
 
+# Everything but (Unicode) digits, '.' and '-'; str.translate can't express "all other characters"
+_CURRENCY_STRIP_RE = re.compile(r'[^\d.-]+')
+
+
 def parse_currency_string(currency_str: str) -> Decimal:
     """
     Parse currency string into Decimal for precise monetary calculations
@@ -219,12 +310,13 @@ def parse_currency_string(currency_str: str) -> Decimal:
     Raises:
         DataConversionError: If currency parsing fails
     """
-    # Remove currency symbols and whitespace
-    clean_str = re.sub(r'[^\d,.-]', '', currency_str.strip())
+    if isinstance(currency_str, Decimal):
+        return currency_str
+    if isinstance(currency_str, int) and not isinstance(currency_str, bool):
+        return Decimal(currency_str)
     
-    # Handle different number formats
-    # Remove commas (thousand separators)
-    clean_str = clean_str.replace(',', '')
+    # Remove currency symbols, whitespace and commas (thousand separators) in one pass
+    clean_str = _CURRENCY_STRIP_RE.sub('', currency_str)
     
     try:
         return Decimal(clean_str)
@@ -232,9 +324,10 @@ def parse_currency_string(currency_str: str) -> Decimal:
         raise DataConversionError(f"Unable to parse currency: '{currency_str}'")
 
 
+@lru_cache(maxsize=256)
 def parse_boolean_string(bool_str: str) -> bool:
     """
-    Parse string into boolean value
+    Parse string into boolean value (memoised; boolean spellings are a tiny domain)
     
     Args:
         bool_str: String representation of boolean
@@ -247,17 +340,35 @@ def parse_boolean_string(bool_str: str) -> bool:
     """
     clean_str = bool_str.strip().lower()
     
-    true_values = {'true', '1', 'yes', 'y', 'on', 'enable', 'enabled', 'active'}
-    false_values = {'false', '0', 'no', 'n', 'off', 'disable', 'disabled', 'inactive'}
-    
-    if clean_str in true_values:
+    if clean_str in _TRUE_VALUES:
         return True
-    elif clean_str in false_values:
+    elif clean_str in _FALSE_VALUES:
         return False
     else:
         raise DataConversionError(f"Unable to parse boolean: '{bool_str}'")
 
 
+# Converters from a stripped string value, looked up once per value instead of walking
+# an if/elif chain. TABLE values are returned as-is before stringifying.
+_TEMPLATE_CONVERTERS: 'MappingProxyType[FieldType, Callable[[str], Any]]' = MappingProxyType({
+    FieldType.TEXT: _convert_text,
+    FieldType.SELECT: _convert_text,
+    FieldType.NUMBER: _convert_number,
+    FieldType.DATE: _convert_date,
+    FieldType.EMAIL: _convert_email,
+    FieldType.CURRENCY: parse_currency_string,
+})
+
+_SUB_TEMPLATE_CONVERTERS: 'MappingProxyType[DataType, Callable[[str], Any]]' = MappingProxyType({
+    DataType.STRING: _convert_text,
+    DataType.SELECT: _convert_text,
+    DataType.INTEGER: _convert_integer,
+    DataType.FLOAT: _convert_float,
+    DataType.DATE: _convert_date,
+    DataType.BOOLEAN: parse_boolean_string,
+})
+
+
 def safe_convert_template_field_value(value: Any, field_type: FieldType, field_name: str = "") -> tuple[Any, Optional[str]]:
     """
     Safely convert a template field value, returning the converted value and any error message
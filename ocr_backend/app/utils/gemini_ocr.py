@@ -1,10 +1,60 @@
 import os
+import functools
+import hashlib
+import logging
 import mimetypes
-from pathlib import Path
-from google import genai
-from google.genai import types
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 import json
-from flask import current_app
+import orjson
+from flask import current_app, has_app_context
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+# The Gemini SDK (google.genai, pydantic models) takes about a second to import, so it is
+# loaded by _load_genai() on first use rather than when the app or a CLI script starts
+genai = types = genai_errors = None
+
+# Model used for document extraction
+GEMINI_OCR_MODEL = "gemini-2.0-flash"
+
+# Gemini calls are network-bound, so independent extractions run concurrently. Across all
+# request threads at most GEMINI_MAX_INFLIGHT calls are open at once and, when
+# GEMINI_MAX_RPS is set (> 0), call starts are spaced at least 1/GEMINI_MAX_RPS seconds apart
+GEMINI_MAX_INFLIGHT = max(1, int(os.environ.get("GEMINI_MAX_INFLIGHT", "8")))
+GEMINI_MAX_RPS = float(os.environ.get("GEMINI_MAX_RPS", "0"))
+
+_inflight = threading.BoundedSemaphore(GEMINI_MAX_INFLIGHT)
+_min_call_interval = 1.0 / GEMINI_MAX_RPS if GEMINI_MAX_RPS > 0 else 0.0
+_pace_lock = threading.Lock()
+_next_call_at = 0.0
+
+# Upper bound on one backoff sleep between retries of a throttled or failed call, in seconds
+_MAX_RETRY_DELAY = 60.0
+
+# Files larger than this go through the Files API instead of inline base64 (which inflates
+# the body by a third; Gemini caps inline requests at 20 MB). Smaller files stay inline:
+# an upload costs an extra round trip and leaves a copy of the document server-side.
+# Uploads live 48h server-side, so a handle is reused for a bit less.
+_INLINE_MAX_BYTES = 14 * 1024 * 1024
+_UPLOAD_REUSE_SECONDS = 47 * 3600
+_UPLOAD_PROCESSING_TIMEOUT = 300
+_UPLOAD_CACHE_SIZE = 256
+_uploaded_files = OrderedDict()  # (api_key, abs path, mtime_ns, size) -> (expires_at, Part)
+_uploaded_files_lock = threading.Lock()
+
+# Opt-in cache of raw responses for repeat extractions (same file bytes, fields and prompt),
+# e.g. re-ingesting a document or a user retry. Off (0) by default: a cached reply is
+# returned even if the model would now answer differently
+GEMINI_RESPONSE_CACHE_SIZE = max(0, int(os.environ.get("GEMINI_RESPONSE_CACHE_SIZE", "0")))
+_responses = OrderedDict()  # (sha1, mime type, field names, custom prompt, table) -> response text
+_responses_lock = threading.Lock()
 
 # Comprehensive mapping of Gemini-supported file types
 SUPPORTED_MIME_TYPES = {
@@ -41,11 +91,17 @@ SUPPORTED_MIME_TYPES = {
     'text/plain': ['.txt']
 }
 
-# Reverse mapping for extension to MIME type lookup
+# Reverse mapping for extension to MIME type lookup (read-only once built)
 EXTENSION_TO_MIME = {}
 for mime_type, extensions in SUPPORTED_MIME_TYPES.items():
     for ext in extensions:
         EXTENSION_TO_MIME[ext.lower()] = mime_type
+EXTENSION_TO_MIME = MappingProxyType(EXTENSION_TO_MIME)
+
+# Listed in the unsupported-file-type error
+_SUPPORTED_EXTENSIONS_TEXT = ', '.join(
+    sorted({ext for exts in SUPPORTED_MIME_TYPES.values() for ext in exts})
+)
 
 def detect_file_type(file_path):
     """
@@ -60,20 +116,21 @@ def detect_file_type(file_path):
     Raises:
         ValueError: If file type is not supported by Gemini API
     """
-    file_path = Path(file_path)
-    
+    return _detect_extension_type(os.path.splitext(file_path)[1].lower())
+
+@functools.lru_cache(maxsize=64)
+def _detect_extension_type(extension):
+    """detect_file_type for a lower-cased extension; the answer depends only on the extension."""
     # Method 1: Check by file extension first (most reliable for our use case)
-    extension = file_path.suffix.lower()
     if extension in EXTENSION_TO_MIME:
         mime_type = EXTENSION_TO_MIME[extension]
     else:
         # Method 2: Use Python's mimetypes module as fallback
-        mime_type, _ = mimetypes.guess_type(str(file_path))
+        mime_type, _ = mimetypes.guess_type(f"file{extension}")
         if mime_type not in SUPPORTED_MIME_TYPES:
-            supported_extensions = [ext for exts in SUPPORTED_MIME_TYPES.values() for ext in exts]
             raise ValueError(
                 f"Unsupported file type: {extension}. "
-                f"Supported file types: {', '.join(sorted(set(supported_extensions)))}"
+                f"Supported file types: {_SUPPORTED_EXTENSIONS_TEXT}"
             )
     
     # Determine file category for adaptive prompting
@@ -102,8 +159,9 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
     Returns:
         str: Optimized prompt for the specific file type
     """
+    fields_csv = ', '.join(field_names)
     if custom_prompt:
-        return custom_prompt + f" Return your answer as a JSON object. Fields: {', '.join(field_names)}"
+        return custom_prompt + f" Return your answer as a JSON object. Fields: {fields_csv}"
     
     base_instruction = "You are an intelligent content analysis assistant. "
     
@@ -114,7 +172,7 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
             "Look carefully at all text, objects, and visual elements in the image. "
             "For documents or forms, pay special attention to the header and top sections. "
             "Return your answer as a JSON object mapping each field name to its value. "
-            f"Fields to extract: {', '.join(field_names)}"
+            f"Fields to extract: {fields_csv}"
         )
     elif file_category == 'video':
         prompt = (
@@ -123,7 +181,7 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
             "Consider both visual elements and any audio/speech content. "
             "Look for text overlays, spoken information, and visual cues throughout the video. "
             "Return your answer as a JSON object mapping each field name to its value. "
-            f"Fields to extract: {', '.join(field_names)}"
+            f"Fields to extract: {fields_csv}"
         )
     elif file_category == 'audio':
         prompt = (
@@ -131,7 +189,7 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
             "Analyze the provided audio content and extract the specified information. "
             "Transcribe and analyze any speech, identify speakers if relevant, and note audio characteristics. "
             "Return your answer as a JSON object mapping each field name to its value. "
-            f"Fields to extract: {', '.join(field_names)}"
+            f"Fields to extract: {fields_csv}"
         )
     elif file_category == 'document':
         prompt = (
@@ -140,7 +198,7 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
             "Carefully read through the entire document, paying attention to headers, sections, and formatted content. "
             "For forms or structured documents, focus on labeled fields and data entries. "
             "Return your answer as a JSON object mapping each field name to its value. "
-            f"Fields to extract: {', '.join(field_names)}"
+            f"Fields to extract: {fields_csv}"
         )
     else:
         # Fallback for unknown file types
@@ -148,34 +206,177 @@ def generate_adaptive_prompt(field_names, file_category, custom_prompt=None):
             base_instruction +
             "Analyze the provided content and extract the specified information. "
             "Return your answer as a JSON object mapping each field name to its value. "
-            f"Fields to extract: {', '.join(field_names)}"
+            f"Fields to extract: {fields_csv}"
         )
     
     return prompt
 
-def call_gemini_ocr(file_path, field_names, custom_prompt=None):
+def _config_value(name):
     """
-    Calls Gemini API to extract specified field names from any supported file type.
-    Automatically detects file type and adapts processing accordingly.
+    Read a setting from the running app's config, or from the Config defaults (which
+    come from the environment) when called outside an app context, e.g. a background worker.
+    """
+    if has_app_context():
+        return current_app.config.get(name)
+    return getattr(Config, name, None)
+
+def _load_genai():
+    """Import the Gemini SDK into this module's globals (genai, types, genai_errors) once."""
+    global genai, types, genai_errors
+    if genai is None:
+        from google import genai as genai_module
+        from google.genai import errors, types as types_module
+        types, genai_errors = types_module, errors
+        genai = genai_module  # last: a non-None genai means all three are set
+
+@functools.lru_cache(maxsize=4)
+def get_gemini_client(api_key):
+    """
+    Return a shared Gemini client for `api_key`.
+    
+    Reusing one client keeps its HTTP connection pool (and TLS sessions) alive across
+    calls instead of paying a fresh handshake per request. The client is safe to
+    share between threads.
+    """
+    _load_genai()
+    return genai.Client(api_key=api_key)
+
+def _wait_for_call_slot():
+    """Sleep until this caller's reserved start slot under GEMINI_MAX_RPS (no-op when unlimited)."""
+    global _next_call_at
+    if not _min_call_interval:
+        return
+    
+    # Reserve the next slot under the lock, but sleep outside it
+    with _pace_lock:
+        now = time.monotonic()
+        slot = max(now, _next_call_at)
+        _next_call_at = slot + _min_call_interval
+    if slot > now:
+        time.sleep(slot - now)
+
+def _uploaded_file_part(api_key, file_path, mime_type, file_stat):
+    """
+    Upload `file_path` through the Gemini Files API and return a Part referencing it.
+    
+    Handles are reused (LRU, keyed by path, mtime and size) until shortly before the
+    server-side expiry, so reprocessing an unchanged document does not upload it again.
+    """
+    key = (api_key, os.path.abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    now = time.monotonic()
+    with _uploaded_files_lock:
+        cached = _uploaded_files.get(key)
+        if cached is not None and cached[0] > now:
+            _uploaded_files.move_to_end(key)
+            return cached[1]
+    
+    client = get_gemini_client(api_key)
+    uploaded = client.files.upload(file=file_path, config={'mime_type': mime_type})
+    
+    # Video and audio are processed server-side before they can be referenced
+    deadline = time.monotonic() + _UPLOAD_PROCESSING_TIMEOUT
+    while uploaded.state == types.FileState.PROCESSING and time.monotonic() < deadline:
+        time.sleep(1)
+        uploaded = client.files.get(name=uploaded.name)
+    if uploaded.state == types.FileState.FAILED:
+        raise ValueError(f"Gemini could not process uploaded file: {file_path}")
+    
+    part = types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type)
+    with _uploaded_files_lock:
+        _uploaded_files[key] = (now + _UPLOAD_REUSE_SECONDS, part)
+        _uploaded_files.move_to_end(key)
+        while len(_uploaded_files) > _UPLOAD_CACHE_SIZE:
+            _uploaded_files.popitem(last=False)
+    return part
+
+@functools.lru_cache(maxsize=256)
+def _file_digest(path, mtime_ns, size):
+    """SHA-1 of a file's contents; `mtime_ns` and `size` make an edited file miss the cache."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def _response_cache_key(file_path, field_names, custom_prompt=None, table=False):
+    """Response cache key for a request, or None when the cache is off or the file is unusable."""
+    if not GEMINI_RESPONSE_CACHE_SIZE:
+        return None
+    try:
+        file_stat = os.stat(file_path)
+        mime_type, _ = detect_file_type(file_path)
+    except (OSError, ValueError):
+        return None  # _prepare_ocr_request raises the proper error
+    digest = _file_digest(os.path.abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+    return digest, mime_type, tuple(field_names), custom_prompt, bool(table)
+
+def _cached_response(key):
+    if key is None:
+        return None
+    with _responses_lock:
+        response_text = _responses.get(key)
+        if response_text is not None:
+            _responses.move_to_end(key)
+        return response_text
+
+def _store_response(key, response_text):
+    if key is None or response_text is None:
+        return
+    with _responses_lock:
+        _responses[key] = response_text
+        _responses.move_to_end(key)
+        while len(_responses) > GEMINI_RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+
+@functools.lru_cache(maxsize=256)
+def _response_config(field_names, table):
+    """
+    Structured-output config for an extraction of `field_names` (a tuple).
+    
+    Gemini then returns plain JSON keyed exactly by the requested names: an object with
+    one nullable string per field, or for tables {"rows": [such objects]}. Values stay
+    strings; typing is done by the template field converters.
+    """
+    field_names = list(field_names)
+    record = types.Schema(
+        type=types.Type.OBJECT,
+        properties={name: types.Schema(type=types.Type.STRING, nullable=True) for name in field_names},
+        required=field_names,
+        property_ordering=field_names
+    )
+    if table:
+        record = types.Schema(
+            type=types.Type.OBJECT,
+            properties={'rows': types.Schema(type=types.Type.ARRAY, items=record)},
+            required=['rows']
+        )
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=record)
+
+def _prepare_ocr_request(file_path, field_names, custom_prompt=None, table=False, file_parts=None):
+    """
+    Validate a Gemini OCR request and build its API key, contents and response config.
+    
+    Runs in the calling thread (it may read the app config).
+    `file_parts` optionally maps file paths to already-built parts, so a batch reads
+    (or uploads) each file once. Files over _INLINE_MAX_BYTES are sent through the
+    Files API rather than inline.
     
-    Args:
-        file_path: Path to the file (images, PDFs, videos, audio, etc.)
-        field_names: List of field names to extract
-        custom_prompt: Optional custom prompt for specialized extraction
-        
     Returns:
-        str: Raw response text from Gemini
-        
-    Raises:
-        ValueError: If file type is unsupported or API key is missing
-        FileNotFoundError: If file doesn't exist
+        tuple: (api_key, contents, config)
     """
-    # Validate file exists
-    if not os.path.exists(file_path):
+    _load_genai()
+    
+    # Validate file exists (one stat, reused below for the size checks)
+    try:
+        file_stat = os.stat(file_path)
+    except (OSError, ValueError):
         raise FileNotFoundError(f"File not found: {file_path}")
+    if not file_stat.st_size:
+        # Gemini rejects empty payloads, but only after a full round trip
+        raise ValueError(f"File is empty: {file_path}")
     
     # Get API key from configuration
-    api_key = current_app.config.get('GEMINI_API_KEY')
+    api_key = _config_value('GEMINI_API_KEY')
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found in configuration. Please set it in your .env file.")
     
@@ -185,26 +386,138 @@ def call_gemini_ocr(file_path, field_names, custom_prompt=None):
     except ValueError as e:
         raise ValueError(f"File type detection failed: {e}")
     
-    # Initialize the client with API key
-    client = genai.Client(api_key=api_key)
-    
-    # Read file as binary data
-    with open(file_path, "rb") as file:
-        file_bytes = file.read()
+    file_part = file_parts.get(file_path) if file_parts is not None else None
+    if file_part is None:
+        if file_stat.st_size > _INLINE_MAX_BYTES:
+            file_part = _uploaded_file_part(api_key, file_path, mime_type, file_stat)
+        else:
+            # Read file as binary data
+            with open(file_path, "rb") as file:
+                file_bytes = file.read()
+            file_part = types.Part.from_bytes(data=file_bytes, mime_type=mime_type)
+        if file_parts is not None:
+            file_parts[file_path] = file_part
     
     # Generate appropriate prompt based on file type
     prompt = generate_adaptive_prompt(field_names, file_category, custom_prompt)
     
-    # Make API call with detected MIME type
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=[
-            prompt,
-            types.Part.from_bytes(data=file_bytes, mime_type=mime_type)
-        ]
-    )
+    # File first, prompt last: the document is the part shared by every prompt sent for
+    # it (text fields, each table), so it forms a common request prefix that Gemini's
+    # prefix caching can reuse; Gemini also recommends media before the instructions
+    return api_key, [file_part, prompt], _response_config(tuple(field_names), table)
+
+def _is_retryable(error):
+    """Rate limiting (429) and server-side (5xx) errors are transient; anything else is not."""
+    code = error.code or 0
+    return code == 429 or code >= 500
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered exponential backoff."""
+    headers = getattr(error.response, 'headers', None)
+    retry_after = headers.get('Retry-After') if headers is not None else None
+    if retry_after:
+        try:
+            return min(_MAX_RETRY_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return min(_MAX_RETRY_DELAY, 2 ** attempt) + random.random()
+
+def _generate_content(api_key, contents, config, max_retries=0):
+    """
+    Make one throttled Gemini API call; safe to run in worker threads.
+    
+    Rate-limit and 5xx errors are retried up to `max_retries` times with backoff
+    (sleeping outside the in-flight limit); other errors propagate immediately.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            with _inflight:
+                _wait_for_call_slot()
+                response = get_gemini_client(api_key).models.generate_content(
+                    model=GEMINI_OCR_MODEL,
+                    contents=contents,
+                    config=config
+                )
+            return response.text
+        except genai_errors.APIError as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(f"Gemini call failed ({e.code} {e.status}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+def call_gemini_ocr(file_path, field_names, custom_prompt=None, table=False):
+    """
+    Calls Gemini API to extract specified field names from any supported file type.
+    Automatically detects file type and adapts processing accordingly.
+    
+    Args:
+        file_path: Path to the file (images, PDFs, videos, audio, etc.)
+        field_names: List of field names to extract
+        custom_prompt: Optional custom prompt for specialized extraction
+        table: Extract table rows ({"rows": [...]}) instead of one value per field
+        
+    Returns:
+        str: Raw response text from Gemini (JSON matching the requested fields)
+        
+    Raises:
+        ValueError: If the file is empty, its type is unsupported or the API key is missing
+        FileNotFoundError: If file doesn't exist
+        google.genai.errors.APIError: If the call still fails after MAX_RETRY_ATTEMPTS
+            retries (rate-limit/5xx errors) or fails with a non-retryable error
+    """
+    cache_key = _response_cache_key(file_path, field_names, custom_prompt, table)
+    response_text = _cached_response(cache_key)
+    if response_text is not None:
+        return response_text
     
-    return response.text
+    api_key, contents, config = _prepare_ocr_request(file_path, field_names, custom_prompt, table)
+    response_text = _generate_content(api_key, contents, config, _config_value('MAX_RETRY_ATTEMPTS') or 0)
+    _store_response(cache_key, response_text)
+    return response_text
+
+def call_gemini_batch(requests):
+    """
+    Run several Gemini extractions concurrently (bounded by GEMINI_MAX_INFLIGHT).
+    
+    Use this instead of calling call_gemini_ocr in a loop when the calls are
+    independent, e.g. the text-field and table prompts for one document: the wall
+    time is roughly that of the slowest call rather than the sum.
+    
+    Args:
+        requests: List of (file_path, field_names, custom_prompt, table) tuples, with
+            the same meaning as the call_gemini_ocr arguments
+        
+    Returns:
+        list: Raw response texts, in the same order as `requests`
+        
+    Raises:
+        Same as call_gemini_ocr. Validation errors are raised before any call is made;
+        if API calls fail, the first failing request's error is raised once all finish.
+    """
+    cache_keys = [_response_cache_key(*request) for request in requests]
+    responses = [_cached_response(key) for key in cache_keys]
+    pending = [i for i, response_text in enumerate(responses) if response_text is None]
+    
+    # A file sent with several prompts is read (or, if large, uploaded) once and its
+    # part shared by each call
+    file_parts = {}
+    prepared = [
+        _prepare_ocr_request(file_path, field_names, custom_prompt, table, file_parts)
+        for file_path, field_names, custom_prompt, table in (requests[i] for i in pending)
+    ]
+    max_retries = _config_value('MAX_RETRY_ATTEMPTS') or 0
+    if len(prepared) <= 1:
+        results = [_generate_content(*request, max_retries) for request in prepared]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(prepared), GEMINI_MAX_INFLIGHT)) as executor:
+            futures = [executor.submit(_generate_content, *request, max_retries) for request in prepared]
+        results = [future.result() for future in futures]
+    
+    for i, response_text in zip(pending, results):
+        responses[i] = response_text
+        _store_response(cache_keys[i], response_text)
+    return responses
 
 def parse_gemini_response(response_text, field_names):
     """
@@ -213,16 +526,30 @@ def parse_gemini_response(response_text, field_names):
     If parsing fails, returns the raw response.
     """
     try:
-        # Clean up the response text (remove markdown code blocks if present)
-        cleaned_text = response_text.strip()
-        if cleaned_text.startswith('```json'):
-            cleaned_text = cleaned_text[7:]
-        if cleaned_text.endswith('```'):
-            cleaned_text = cleaned_text[:-3]
-        if cleaned_text.startswith('```'):
-            cleaned_text = cleaned_text[3:]
-        
-        data = json.loads(cleaned_text.strip())
+        try:
+            # Structured-output responses are plain JSON; orjson parses large row tables much faster
+            data = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            # Clean up the response text (remove markdown code blocks if present). The
+            # stdlib parser also accepts what orjson rejects (NaN, integers over 64 bits)
+            cleaned_text = response_text.strip()
+            if cleaned_text.startswith('```json'):
+                cleaned_text = cleaned_text[7:]
+            if cleaned_text.endswith('```'):
+                cleaned_text = cleaned_text[:-3]
+            if cleaned_text.startswith('```'):
+                cleaned_text = cleaned_text[3:]
+            cleaned_text = cleaned_text.strip()
+            
+            # Empty replies and plain-text refusals can never yield a field dict or row
+            # list, so report them without paying for a failed json.loads
+            if cleaned_text[:1] not in ('{', '['):
+                error = "Response is empty" if not cleaned_text else "Response is not a JSON object or array"
+                logger.warning("JSON parsing error: %s", error)
+                logger.debug("Response text (first 512 chars): %s", response_text[:512])
+                return {"raw_response": response_text, "parse_error": error}
+            
+            data = json.loads(cleaned_text)
         
         # Handle different response formats for table data
         if isinstance(data, list):
@@ -234,25 +561,26 @@ def parse_gemini_response(response_text, field_names):
             
         # For regular field extraction, ensure all requested fields are included
         result = {}
+        lower_data = None
         for field in field_names:
             value = data.get(field)
             if value is not None:
                 result[field] = value
             else:
-                # Try case-insensitive match
-                for key, val in data.items():
-                    if key.lower() == field.lower():
-                        result[field] = val
-                        break
-                else:
-                    result[field] = None
+                # Try case-insensitive match (first matching key wins), lower-casing the
+                # response keys once per response rather than once per missing field
+                if lower_data is None:
+                    lower_data = {}
+                    for key, val in data.items():
+                        lower_data.setdefault(key.lower(), val)
+                result[field] = lower_data.get(field.lower())
         
         return result
         
     except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Response text: {response_text}")
+        logger.warning("JSON parsing error: %s", e)
+        logger.debug("Response text (first 512 chars): %s", response_text[:512])
         return {"raw_response": response_text, "parse_error": str(e)}
     except Exception as e:
-        print(f"General parsing error: {e}")
+        logger.warning("General parsing error: %s", e)
         return {"raw_response": response_text, "parse_error": str(e)}
@@ -0,0 +1,72 @@
+"""
+Shared fixtures for the app-backed tests.
+
+One app is built per test session on a private in-memory SQLite database, so tests never
+touch the on-disk ocr_platform.db and each pytest-xdist worker (`pytest -q -n auto`) gets
+its own database.
+"""
+import os
+import sys
+import pytest
+from werkzeug.security import generate_password_hash
+
+# Ensure the package root (ocr_backend) is on sys.path so `import app` works when pytest
+# is executed from the repository root.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.config import Config
+from app.models.user import User
+
+# Hashed once: the password KDF is deliberately slow and every test user shares a password
+TEST_PASSWORD = 'password'
+TEST_PASSWORD_HASH = generate_password_hash(TEST_PASSWORD)
+
+
+class InMemoryConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    TESTING = True
+
+
+@pytest.fixture(scope="session")
+def app():
+    # create_app creates the tables
+    app = create_app(InMemoryConfig)
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def in_memory_config():
+    # For tests that build their own app; subclass it to point at another database
+    return InMemoryConfig
+
+
+@pytest.fixture
+def fresh_db(app):
+    # For tests that create rows through the API: empty the tables afterwards. Deleting
+    # rows keeps the session-wide schema and is ~10x cheaper than drop_all/create_all;
+    # a rolled-back outer transaction doesn't fit, since the endpoints under test commit
+    yield db
+    db.session.remove()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(fresh_db):
+    # A committed user, with the precomputed hash assigned instead of calling set_password
+    user = User(name='Test User', email='test@example.com', password_hash=TEST_PASSWORD_HASH)
+    db.session.add(user)
+    db.session.commit()
+    return user
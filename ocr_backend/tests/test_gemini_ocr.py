@@ -0,0 +1,302 @@
+"""
+Tests for the Gemini OCR helpers in app/utils/gemini_ocr.py. The Gemini client is replaced
+by a stub, so these run offline and never need a real API key.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+import pytest
+from google.genai import errors as genai_errors
+
+from app.utils import gemini_ocr
+
+
+def _api_error(code, status='ERROR', retry_after=None):
+    error_class = genai_errors.ServerError if code >= 500 else genai_errors.ClientError
+    response = httpx.Response(code, headers={'Retry-After': retry_after}) if retry_after is not None else None
+    return error_class(code, {'error': {'code': code, 'message': status, 'status': status}}, response)
+
+
+class StubModels:
+    """Stands in for client.models: answers with `reply(contents)` and records each call."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, model, contents, config):
+        with self._lock:
+            self.calls.append(contents)
+        return type('Response', (), {'text': self.reply(contents)})()
+
+
+class StubFiles:
+    """Stands in for client.files: records uploads and returns an already processed file."""
+
+    def __init__(self):
+        self.uploaded = []
+
+    def upload(self, file, config):
+        self.uploaded.append(file)
+        return type('File', (), {
+            'name': f'files/{len(self.uploaded)}',
+            'uri': f'https://files.example/{len(self.uploaded)}',
+            'mime_type': config['mime_type'],
+            'state': gemini_ocr.types.FileState.ACTIVE,
+        })()
+
+
+class StubClient:
+    def __init__(self, reply):
+        self.models = StubModels(reply)
+        self.files = StubFiles()
+
+
+@pytest.fixture
+def gemini_config(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'GEMINI_API_KEY', 'test-key')
+    monkeypatch.setitem(app.config, 'MAX_RETRY_ATTEMPTS', 0)
+    return app.config
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    """Install a stub Gemini client; set `stub_client.models.reply` to choose its answers."""
+    gemini_ocr._load_genai()
+    client = StubClient(lambda contents: '{}')
+    monkeypatch.setattr(gemini_ocr, 'get_gemini_client', lambda api_key: client)
+    monkeypatch.setattr(gemini_ocr, '_uploaded_files', OrderedDict())
+    return client
+
+
+def _document(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def _file_bytes(contents):
+    """Bytes of the inline document part of a request's contents."""
+    return contents[0].inline_data.data
+
+
+def test_batch_returns_responses_in_request_order(gemini_config, stub_client, tmp_path):
+    # The first request answers last, so completion order differs from request order
+    delays = {b'first': 0.2, b'second': 0.0, b'third': 0.1}
+
+    def reply(contents):
+        data = _file_bytes(contents)
+        time.sleep(delays[data])
+        return data.decode()
+
+    stub_client.models.reply = reply
+    requests = [
+        (_document(tmp_path, f'{name}.png', name.encode()), ['invoice_number'], None, False)
+        for name in ('first', 'second', 'third')
+    ]
+
+    assert gemini_ocr.call_gemini_batch(requests) == ['first', 'second', 'third']
+
+
+def test_batch_raises_a_request_error_after_all_calls_finish(gemini_config, stub_client, tmp_path):
+    def reply(contents):
+        if _file_bytes(contents) == b'bad':
+            raise _api_error(400, 'INVALID_ARGUMENT')
+        return 'ok'
+
+    stub_client.models.reply = reply
+    requests = [
+        (_document(tmp_path, f'{name}.png', name.encode()), ['invoice_number'], None, False)
+        for name in ('good', 'bad', 'fine')
+    ]
+
+    with pytest.raises(genai_errors.ClientError) as excinfo:
+        gemini_ocr.call_gemini_batch(requests)
+    assert excinfo.value.code == 400
+    assert len(stub_client.models.calls) == 3
+
+
+def test_batch_inlines_a_small_file_shared_by_several_prompts(gemini_config, stub_client, tmp_path):
+    invoice = _document(tmp_path, 'invoice.png', b'invoice')
+    requests = [
+        (invoice, ['invoice_number'], None, False),
+        (invoice, ['item_description', 'quantity'], None, True),
+    ]
+
+    gemini_ocr.call_gemini_batch(requests)
+
+    assert stub_client.files.uploaded == []
+    assert [_file_bytes(contents) for contents in stub_client.models.calls] == [b'invoice', b'invoice']
+
+
+def test_batch_uploads_a_large_file_once(gemini_config, stub_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini_ocr, '_INLINE_MAX_BYTES', 4)
+    invoice = _document(tmp_path, 'invoice.png', b'large invoice')
+    requests = [
+        (invoice, ['invoice_number'], None, False),
+        (invoice, ['item_description', 'quantity'], None, True),
+    ]
+
+    gemini_ocr.call_gemini_batch(requests)
+
+    assert stub_client.files.uploaded == [invoice]
+    assert [contents[0].file_data.file_uri for contents in stub_client.models.calls] == ['https://files.example/1'] * 2
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting, with the retry jitter pinned to zero."""
+    slept = []
+    monkeypatch.setattr(gemini_ocr.time, 'sleep', slept.append)
+    monkeypatch.setattr(gemini_ocr.random, 'random', lambda: 0.0)
+    return slept
+
+
+def _failing_then(errors, text='ok'):
+    """A reply that raises each of `errors` in turn, then answers `text`."""
+    errors = list(errors)
+
+    def reply(contents):
+        if errors:
+            raise errors.pop(0)
+        return text
+    return reply
+
+
+@pytest.mark.parametrize('code,retryable', [(429, True), (500, True), (503, True), (400, False), (403, False), (404, False)])
+def test_is_retryable(code, retryable):
+    assert gemini_ocr._is_retryable(_api_error(code)) is retryable
+
+
+def test_throttled_and_server_errors_are_retried_with_backoff(stub_client, sleeps):
+    stub_client.models.reply = _failing_then([_api_error(429, 'RESOURCE_EXHAUSTED'), _api_error(503, 'UNAVAILABLE')])
+
+    assert gemini_ocr._generate_content('test-key', ['contents'], None, max_retries=3) == 'ok'
+    assert len(stub_client.models.calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_client_errors_are_not_retried(stub_client, sleeps):
+    stub_client.models.reply = _failing_then([_api_error(400, 'INVALID_ARGUMENT')])
+
+    with pytest.raises(genai_errors.ClientError):
+        gemini_ocr._generate_content('test-key', ['contents'], None, max_retries=3)
+    assert len(stub_client.models.calls) == 1
+    assert sleeps == []
+
+
+def test_retry_after_header_is_honoured(stub_client, sleeps):
+    stub_client.models.reply = _failing_then([_api_error(429, 'RESOURCE_EXHAUSTED', retry_after='7')])
+
+    assert gemini_ocr._generate_content('test-key', ['contents'], None, max_retries=1) == 'ok'
+    assert sleeps == [7.0]
+
+
+@pytest.mark.parametrize('error,attempt', [
+    (_api_error(503), 10),
+    (_api_error(429, 'RESOURCE_EXHAUSTED', retry_after='600'), 0),
+], ids=['backoff', 'retry_after'])
+def test_retry_delay_is_capped(error, attempt, sleeps):
+    assert gemini_ocr._retry_delay(error, attempt) == gemini_ocr._MAX_RETRY_DELAY == 60.0
+
+
+def test_last_error_is_raised_after_max_retries(stub_client, sleeps):
+    errors = [_api_error(503, 'UNAVAILABLE') for _ in range(3)]
+    stub_client.models.reply = _failing_then(errors)
+
+    with pytest.raises(genai_errors.ServerError) as excinfo:
+        gemini_ocr._generate_content('test-key', ['contents'], None, max_retries=2)
+    assert excinfo.value is errors[-1]
+    assert len(stub_client.models.calls) == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_response_config_schemas():
+    gemini_ocr._load_genai()
+    fields = ('invoice_number', 'vendor_name')
+
+    record = gemini_ocr._response_config(fields, False).response_schema
+    assert list(record.properties) == list(fields)
+    assert record.required == list(fields)
+
+    table = gemini_ocr._response_config(fields, True).response_schema
+    assert table.required == ['rows']
+    assert table.properties['rows'].items.required == list(fields)
+
+
+def test_parse_structured_object():
+    parsed = gemini_ocr.parse_gemini_response(
+        '{"invoice_number": "INV-1", "Vendor_Name": "Acme"}', ['invoice_number', 'vendor_name', 'due_date']
+    )
+
+    # Keys are matched case-insensitively and every requested field is present
+    assert parsed == {'invoice_number': 'INV-1', 'vendor_name': 'Acme', 'due_date': None}
+
+
+def test_parse_structured_table_reply():
+    rows = '{"rows": [{"item_description": "Saree", "quantity": "2"}, {"item_description": "Dupatta", "quantity": null}]}'
+
+    parsed = gemini_ocr.parse_gemini_response(rows, ['item_description', 'quantity'])
+
+    assert parsed == {'rows': [
+        {'item_description': 'Saree', 'quantity': '2'},
+        {'item_description': 'Dupatta', 'quantity': None},
+    ]}
+
+
+@pytest.mark.parametrize('response_text,expected', [
+    ('```json\n{"invoice_number": "INV-1"}\n```', {'invoice_number': 'INV-1'}),
+    ('```\n[{"quantity": "2"}]\n```', {'rows': [{'quantity': '2'}]}),
+], ids=['fenced_object', 'fenced_rows'])
+def test_parse_fenced_legacy_replies(response_text, expected):
+    assert gemini_ocr.parse_gemini_response(response_text, ['invoice_number']) == expected
+
+
+def test_parse_falls_back_to_the_stdlib_parser():
+    # orjson rejects NaN; the stdlib parser accepts it
+    parsed = gemini_ocr.parse_gemini_response('{"total_amount": NaN}', ['total_amount'])
+
+    assert math.isnan(parsed['total_amount'])
+
+
+@pytest.mark.parametrize('response_text,error', [
+    ('', 'Response is empty'),
+    ('```json\n```', 'Response is empty'),
+    ('I could not find any invoice fields in this document.', 'Response is not a JSON object or array'),
+], ids=['empty', 'empty_fence', 'plain_text'])
+def test_parse_reports_non_json_replies(response_text, error):
+    parsed = gemini_ocr.parse_gemini_response(response_text, ['invoice_number'])
+
+    assert parsed == {'raw_response': response_text, 'parse_error': error}
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    monkeypatch.setattr(gemini_ocr, 'GEMINI_RESPONSE_CACHE_SIZE', 8)
+    monkeypatch.setattr(gemini_ocr, '_responses', OrderedDict())
+    return gemini_ocr._responses
+
+
+def test_response_cache_hits_and_misses(gemini_config, stub_client, response_cache, tmp_path):
+    stub_client.models.reply = lambda contents: f'reply {len(stub_client.models.calls)}'
+    invoice = _document(tmp_path, 'invoice.png', b'invoice v1')
+
+    first = gemini_ocr.call_gemini_ocr(invoice, ['invoice_number'])
+    # Same file bytes, fields and prompt: answered from the cache, also inside a batch
+    assert gemini_ocr.call_gemini_ocr(invoice, ['invoice_number']) == first
+    assert gemini_ocr.call_gemini_batch([(invoice, ['invoice_number'], None, False)]) == [first]
+    assert len(stub_client.models.calls) == 1
+
+    # A different field list misses
+    assert gemini_ocr.call_gemini_ocr(invoice, ['invoice_number', 'vendor_name']) == 'reply 2'
+
+    # So does the same path after the file was replaced
+    with open(invoice, 'wb') as file:
+        file.write(b'invoice v2, edited')
+    assert gemini_ocr.call_gemini_ocr(invoice, ['invoice_number']) == 'reply 3'
+    assert len(stub_client.models.calls) == 3
+    assert len(response_cache) == 3
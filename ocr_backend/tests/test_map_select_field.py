@@ -1,12 +1,15 @@
 import json
+from dotenv import dotenv_values
 from flask import Flask
-import sys, os
+import os
+import functools
 import logging
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 
 from app.api.ocr_routes import map_select_field_value
 
+OPTIONS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'supplier_and_party_names.json'))
+
 
 class MockOption:
     def __init__(self, value, label):
@@ -20,19 +23,31 @@ def load_options(json_path):
     return [MockOption(label, label) for label in labels]
 
 
+@functools.lru_cache(maxsize=1)
+def _cached_options(json_path):
+    """Parse the options file once per run; every test definition maps against the same list."""
+    options = tuple(load_options(json_path))
+    return options, frozenset(opt.option_value for opt in options)
+
+
 def _load_env_into_app(app):
     """Load GEMINI_API_KEY from repository .env into Flask app config if present."""
     env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
     if os.path.exists(env_path):
-        with open(env_path, 'r', encoding='utf-8') as fh:
-            for line in fh:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                if '=' in line:
-                    k, v = line.split('=', 1)
-                    if k.strip() == 'GEMINI_API_KEY':
-                        app.config['GEMINI_API_KEY'] = v.strip()
+        api_key = dotenv_values(env_path).get('GEMINI_API_KEY')
+        if api_key is not None:
+            app.config['GEMINI_API_KEY'] = api_key
+
+
+@functools.lru_cache(maxsize=1)
+def _get_app():
+    """Flask app shared by every test definition, with the .env key loaded and route logs muted."""
+    app = Flask(__name__)
+    _load_env_into_app(app)
+    # suppress noisy LLM/ocr route error logs during tests so output stays clean
+    logging.getLogger('app.api.ocr_routes').setLevel(logging.CRITICAL)
+    logging.getLogger('ocr_routes').setLevel(logging.CRITICAL)
+    return app
 
 
 TEST_DEFINITIONS = {
@@ -52,52 +67,32 @@ TEST_DEFINITIONS = {
 }
 
 
-def run_test(test_type):
-    if test_type not in TEST_DEFINITIONS:
-        print(f"Unknown test type: {test_type}")
-        return
-
-    cfg = TEST_DEFINITIONS[test_type]
-    app = Flask(__name__)
-    _load_env_into_app(app)
-    # suppress noisy LLM/ocr route error logs during tests so output stays clean
-    logging.getLogger('app.api.ocr_routes').setLevel(logging.CRITICAL)
-    logging.getLogger('ocr_routes').setLevel(logging.CRITICAL)
-    options = load_options(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'supplier_and_party_names.json')))
-
-    with app.app_context():
-        ocr_value = cfg['input']
-        mapped = map_select_field_value(ocr_value, options, 'supplier_name')
-
-        # Determine pass/fail based on expectation type (only 'in_options' or 'none')
-        if cfg['expect'] == 'none':
-            passed = (mapped is None)
-        elif cfg['expect'] == 'in_options':
-            option_values = [opt.option_value for opt in options]
-            passed = (mapped in option_values)
-        else:
-            print(f"{test_type}: Unknown expectation '{cfg['expect']}' (allowed: 'in_options', 'none')")
-            return
-
-        status = 'PASSED' if passed else 'FAILED'
-        # Unified two-line output requested by user
-        print(f"{test_type}: {status}")
-        print(f"Given query:{ocr_value} matches to :{mapped}")
-
+@pytest.fixture(scope="module")
+def supplier_options():
+    """(options, option values) from supplier_and_party_names.json, parsed once per worker."""
+    if not os.path.exists(OPTIONS_PATH):
+        pytest.skip("supplier_and_party_names.json not present")
+    return _cached_options(OPTIONS_PATH)
 
-def main():
-    print("Running parameterized map_select_field tests...")
-    try:
-        for t in TEST_DEFINITIONS.keys():
-            run_test(t)
-        print("All tests completed")
-    except Exception as e:
-        print("An unexpected error occurred while running tests:", e)
-        raise
 
+@pytest.fixture(scope="module")
+def app_ctx():
+    with _get_app().app_context():
+        yield
 
-if __name__ == '__main__':
-    main()
 
+# The definitions are independent once the options are parsed, so pytest can spread them
+# across workers (`pytest -q -n auto tests/test_map_select_field.py` with pytest-xdist)
+@pytest.mark.parametrize('test_type,cfg', list(TEST_DEFINITIONS.items()), ids=list(TEST_DEFINITIONS))
+def test_map_select_field(test_type, cfg, supplier_options, app_ctx):
+    options, option_values = supplier_options
+    mapped = map_select_field_value(cfg['input'], options, 'supplier_name')
 
+    # Check against the expectation type (only 'in_options' or 'none')
+    if cfg['expect'] == 'none':
+        assert mapped is None, f"{test_type}: {cfg['input']!r} mapped to {mapped!r}"
+    elif cfg['expect'] == 'in_options':
+        assert mapped in option_values, f"{test_type}: {cfg['input']!r} mapped to {mapped!r}"
+    else:
+        pytest.fail(f"{test_type}: Unknown expectation '{cfg['expect']}' (allowed: 'in_options', 'none')")
 
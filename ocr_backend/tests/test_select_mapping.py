@@ -0,0 +1,77 @@
+"""
+Tests for mapping OCR values to SELECT options (map_select_field_value). The Gemini
+confirmation step is disabled by clearing GEMINI_API_KEY, in which case the best fuzzy
+match is used, so these run offline.
+"""
+from types import SimpleNamespace
+
+import pytest
+from rapidfuzz import utils as fuzz_utils
+
+from app.api import ocr_routes
+from app.api.ocr_routes import map_select_field_value
+
+
+class Option:
+    def __init__(self, label):
+        self.option_value = label
+        self.option_label = label
+
+
+SUPPLIERS = [Option(label) for label in (
+    'AMBIKA SAREES PVT LTD', 'A.M & SONS', "QUEEN'S EMPORIUM", 'MAHA LAXMI TEXTILES', 'ZANVAR SAREES'
+)]
+
+
+@pytest.fixture(autouse=True)
+def no_llm(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'GEMINI_API_KEY', None)
+
+
+@pytest.mark.parametrize('text,folded', [
+    ('  A.M & Sons!  ', 'a m   sons'),
+    ("Queen's Emporium", 'queen s emporium'),
+    ('AMBIKA-SAREES, PVT. LTD.', 'ambika sarees  pvt  ltd'),
+])
+def test_folding_matches_fuzzywuzzy_full_process(text, folded):
+    # fuzzywuzzy's full_process: non-alphanumerics to spaces, lower-cased, trimmed
+    assert fuzz_utils.default_process(text) == folded
+
+
+@pytest.mark.parametrize('ocr_value,expected', [
+    ('ambika sarees pvt ltd', 'AMBIKA SAREES PVT LTD'),
+    ('AMBIKA SAREES PVT. LTD.', 'AMBIKA SAREES PVT LTD'),
+    ('  Zanvar   Sarees ', 'ZANVAR SAREES'),
+    ('QUEENS EMPORIUM', "QUEEN'S EMPORIUM"),
+    ('a.m. & sons', 'A.M & SONS'),
+    ('qwertyuiopasdfgh', None),
+])
+def test_case_and_punctuation_do_not_affect_matching(ocr_value, expected):
+    assert map_select_field_value(ocr_value, SUPPLIERS, 'supplier_name') == expected
+
+
+@pytest.mark.parametrize('raw_score,expected', [
+    (74.5, None),             # rounds half-to-even to 74, below the 75% cutoff
+    (74.6, SUPPLIERS[0].option_value),
+    (75.0, SUPPLIERS[0].option_value),
+])
+def test_similarity_cutoff_applies_to_rounded_scores(raw_score, expected, monkeypatch):
+    scored = SimpleNamespace(extract=lambda *args, **kwargs: [('label', raw_score, 0)])
+    monkeypatch.setattr(ocr_routes, 'process', scored)
+
+    assert map_select_field_value('ambika', SUPPLIERS, 'supplier_name') == expected
+
+
+@pytest.mark.parametrize('ocr_value', [' ', '!!!', '- -'])
+def test_values_without_letters_or_digits_do_not_match(ocr_value):
+    # A label that folds to nothing must not be taken as an exact match for them
+    options = [Option('-')] + SUPPLIERS
+
+    assert map_select_field_value(ocr_value, options, 'supplier_name') is None
+
+
+def test_labels_that_fold_to_nothing_are_not_exact_matches():
+    labels, exact_index = ocr_routes.processed_option_labels([Option('-'), Option('PCS')])
+
+    assert labels == ['', 'pcs']
+    assert exact_index == {'pcs': 1}
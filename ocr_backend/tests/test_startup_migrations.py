@@ -0,0 +1,122 @@
+"""
+Tests for the schema fix-ups create_app runs against databases created by older versions,
+where db.create_all() leaves existing tables (and their indexes) untouched.
+"""
+import sqlite3
+
+import pytest
+from sqlalchemy import Index, inspect
+
+from app import create_app, db
+
+
+LEGACY_OPTION_TABLES = {
+    'field_options': 'field_id',
+    'sub_template_field_options': 'sub_temp_field_id',
+}
+
+
+def _legacy_database(path):
+    with sqlite3.connect(path) as conn:
+        # Field tables as they were before options_hash was added
+        conn.execute(
+            'CREATE TABLE template_fields (field_id INTEGER PRIMARY KEY, template_id INTEGER NOT NULL, '
+            'field_name VARCHAR(50) NOT NULL, field_order INTEGER NOT NULL, field_type VARCHAR(20) NOT NULL, '
+            'ai_instructions TEXT, created_at DATETIME, updated_at DATETIME)'
+        )
+        conn.execute(
+            'CREATE TABLE sub_template_fields (sub_temp_field_id INTEGER PRIMARY KEY, field_id INTEGER NOT NULL, '
+            'field_name VARCHAR(50) NOT NULL, data_type VARCHAR(20) NOT NULL, '
+            'ai_instructions TEXT, created_at DATETIME, updated_at DATETIME)'
+        )
+        # Option tables as they were before the composite indexes were declared on the models
+        for table_name, owner_column in LEGACY_OPTION_TABLES.items():
+            conn.execute(
+                f'CREATE TABLE {table_name} (id INTEGER PRIMARY KEY, {owner_column} INTEGER NOT NULL, '
+                'option_value VARCHAR(100) NOT NULL, option_label VARCHAR(100) NOT NULL, '
+                'created_at DATETIME, updated_at DATETIME)'
+            )
+    conn.close()
+
+
+@pytest.fixture
+def legacy_db_path(tmp_path):
+    db_path = tmp_path / 'legacy.db'
+    _legacy_database(db_path)
+    return db_path
+
+
+@pytest.fixture
+def upgrade(in_memory_config):
+    def upgrade(db_path):
+        """Run create_app against the database file; return {table: {'columns': ..., 'indexes': ...}}."""
+        class LegacyConfig(in_memory_config):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+
+        app = create_app(LegacyConfig)
+        with app.app_context():
+            inspector = inspect(db.engine)
+            schema = {
+                table_name: {
+                    'columns': {column['name'] for column in inspector.get_columns(table_name)},
+                    'indexes': {index['name']: index['column_names'] for index in inspector.get_indexes(table_name)},
+                }
+                for table_name in ('template_fields', 'sub_template_fields', *LEGACY_OPTION_TABLES)
+            }
+            db.session.remove()
+            db.engine.dispose()
+        return schema
+    return upgrade
+
+
+def test_options_hash_added_to_existing_field_tables(legacy_db_path, upgrade):
+    schema = upgrade(legacy_db_path)
+
+    assert 'options_hash' in schema['template_fields']['columns']
+    assert 'options_hash' in schema['sub_template_fields']['columns']
+
+
+def test_option_indexes_added_to_existing_tables(legacy_db_path, upgrade):
+    schema = upgrade(legacy_db_path)
+
+    field_indexes = schema['field_options']['indexes']
+    assert field_indexes['ix_field_options_field_id_option_value'] == ['field_id', 'option_value']
+    assert field_indexes['ix_field_options_field_id_updated_at'] == ['field_id', 'updated_at']
+    assert schema['sub_template_field_options']['indexes'][
+        'ix_sub_template_field_options_sub_temp_field_id_option_value'
+    ] == ['sub_temp_field_id', 'option_value']
+
+
+def test_failed_index_does_not_skip_the_others(legacy_db_path, upgrade, monkeypatch):
+    create = Index.create
+
+    def failing_create(index, bind, checkfirst=False):
+        if index.name == 'ix_field_options_field_id_option_value':
+            raise RuntimeError('index build failed')
+        return create(index, bind, checkfirst)
+
+    monkeypatch.setattr(Index, 'create', failing_create)
+
+    schema = upgrade(legacy_db_path)
+
+    field_indexes = schema['field_options']['indexes']
+    assert 'ix_field_options_field_id_option_value' not in field_indexes
+    assert 'ix_field_options_field_id_updated_at' in field_indexes
+    assert 'ix_sub_template_field_options_sub_temp_field_id_option_value' in (
+        schema['sub_template_field_options']['indexes']
+    )
+
+
+def test_updated_at_index_added_after_option_value_indexes(legacy_db_path, upgrade):
+    # A database already upgraded with the (owner, option_value) indexes, but not the
+    # index the options summary reads MAX(updated_at) from
+    with sqlite3.connect(legacy_db_path) as conn:
+        for table_name, owner_column in LEGACY_OPTION_TABLES.items():
+            conn.execute(
+                f'CREATE INDEX ix_{table_name}_{owner_column}_option_value ON {table_name} ({owner_column}, option_value)'
+            )
+    conn.close()
+
+    schema = upgrade(legacy_db_path)
+
+    assert schema['field_options']['indexes']['ix_field_options_field_id_updated_at'] == ['field_id', 'updated_at']
@@ -0,0 +1,268 @@
+"""
+Tests for how Tally option loads are written to the option tables: the in-place sync
+behind clear_existing, appending without it, and batch refreshes. Tally itself is never
+contacted; the option lists are stored directly or through a mocked fetch.
+"""
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import TemplateField, Template, FieldOption, SubTemplateField
+from app.utils.enums import FieldType, FieldName, DataType
+from app.tally import tally_field_options
+
+
+@pytest.fixture
+def unit_field(user):
+    template = Template(user_id=user.user_id, name='Units')
+    db.session.add(template)
+    db.session.flush()
+    field = TemplateField(
+        template_id=template.temp_id,
+        field_name=FieldName.UNIT_OF_MEASUREMENT,
+        field_order=1,
+        field_type=FieldType.SELECT
+    )
+    db.session.add(field)
+    db.session.commit()
+    return field
+
+
+@pytest.fixture
+def unit_sub_field(unit_field):
+    sub_field = SubTemplateField(
+        field_id=unit_field.field_id,
+        field_name=FieldName.UNIT_OF_MEASUREMENT,
+        data_type=DataType.SELECT
+    )
+    db.session.add(sub_field)
+    db.session.commit()
+    return sub_field
+
+
+@pytest.fixture
+def tally_units(monkeypatch):
+    # Every Tally units fetch returns this list
+    units = [{'name': 'PCS'}, {'name': 'KG'}, {'name': 'BOX'}]
+    monkeypatch.setattr(tally_field_options, '_fetch_tally_list', lambda fetcher, version: units)
+    return units
+
+
+@contextlib.contextmanager
+def _write_statements():
+    """Collect the INSERT/UPDATE/DELETE statements sent to the database inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def _sync(field_id, options, clear_existing=True):
+    result = tally_field_options._store_field_options(field_id, options, clear_existing)
+    db.session.commit()
+    return result
+
+
+def _stored(field_id):
+    """{option_value: (options_id, option_label)} for the field's stored options."""
+    return {
+        option.option_value: (option.options_id, option.option_label)
+        for option in FieldOption.query.filter_by(field_id=field_id)
+    }
+
+
+def test_sync_keeps_ids_of_unchanged_rows(unit_field):
+    _sync(unit_field.field_id, [('PCS', 'PCS'), ('KG', 'KG')])
+    before = _stored(unit_field.field_id)
+
+    _sync(unit_field.field_id, [('PCS', 'PCS'), ('KG', 'KG'), ('BOX', 'BOX')])
+    after = _stored(unit_field.field_id)
+
+    assert after['PCS'] == before['PCS']
+    assert after['KG'] == before['KG']
+    assert set(after) == {'PCS', 'KG', 'BOX'}
+
+
+def test_sync_relabels_rows_in_place(unit_field):
+    _sync(unit_field.field_id, [('PCS', 'Pieces'), ('KG', 'KG')])
+    before = _stored(unit_field.field_id)
+
+    _sync(unit_field.field_id, [('PCS', 'Pcs.'), ('KG', 'KG')])
+    after = _stored(unit_field.field_id)
+
+    assert after['PCS'] == (before['PCS'][0], 'Pcs.')
+    assert after['KG'] == before['KG']
+
+
+def test_sync_deletes_stale_and_inserts_new_values_in_pages(unit_field, monkeypatch):
+    # Small pages so stale deletes and inserts both span several statements
+    monkeypatch.setattr(tally_field_options, '_INSERT_PAGE_SIZE', 2)
+    old_values = ['PCS', 'KG', 'BOX', 'LTR', 'MTR']
+    _sync(unit_field.field_id, [(value, value) for value in old_values])
+    before = _stored(unit_field.field_id)
+
+    new_values = ['PCS', 'DOZ', 'SET', 'PAIR', 'ROLL']
+    options_count, option_ids, unchanged = _sync(unit_field.field_id, [(value, value) for value in new_values])
+    after = _stored(unit_field.field_id)
+
+    assert (options_count, unchanged) == (5, False)
+    assert set(after) == set(new_values)
+    assert after['PCS'] == before['PCS']
+    if option_ids is not None:
+        # IDs come back from INSERT ... RETURNING where the database supports it
+        assert sorted(option_ids) == sorted(after[value][0] for value in new_values if value != 'PCS')
+
+
+def test_sync_drops_duplicate_values(unit_field):
+    field_id = unit_field.field_id
+    db.session.add_all([
+        FieldOption(field_id=field_id, option_value='PCS', option_label='PCS'),
+        FieldOption(field_id=field_id, option_value='PCS', option_label='Pieces'),
+    ])
+    db.session.commit()
+
+    _sync(field_id, [('PCS', 'PCS')])
+
+    assert FieldOption.query.filter_by(field_id=field_id).count() == 1
+
+
+def test_append_keeps_existing_options(unit_field):
+    _sync(unit_field.field_id, [('PCS', 'PCS'), ('KG', 'KG')])
+    before = _stored(unit_field.field_id)
+
+    _sync(unit_field.field_id, [('BOX', 'BOX')], clear_existing=False)
+    after = _stored(unit_field.field_id)
+
+    assert after['PCS'] == before['PCS']
+    assert after['KG'] == before['KG']
+    assert set(after) == {'PCS', 'KG', 'BOX'}
+
+
+def test_identical_sync_writes_nothing(unit_field, tally_units):
+    first = tally_field_options.load_units_as_options(unit_field.field_id)
+    assert 'skip_reason' not in first
+    before = {option.options_id: option.updated_at for option in FieldOption.query.filter_by(field_id=unit_field.field_id)}
+    db.session.expire_all()
+
+    with _write_statements() as statements:
+        second = tally_field_options.load_units_as_options(unit_field.field_id)
+
+    assert statements == []
+    assert second['success'] is True
+    assert second['skip_reason'] == 'unchanged'
+    assert second['options_count'] == len(tally_units)
+    after = {option.options_id: option.updated_at for option in FieldOption.query.filter_by(field_id=unit_field.field_id)}
+    assert after == before
+
+
+def test_manual_field_option_forces_next_sync(unit_field, tally_units, client):
+    tally_field_options.load_units_as_options(unit_field.field_id)
+    assert db.session.get(TemplateField, unit_field.field_id).options_hash is not None
+
+    rv = client.post(f'/api/templates/fields/{unit_field.field_id}/options',
+                     json={'option_value': 'DOZ', 'option_label': 'Dozen'})
+    assert rv.status_code == 201
+    db.session.expire_all()
+    assert db.session.get(TemplateField, unit_field.field_id).options_hash is None
+
+    # The same Tally list is synced again, replacing the hand-added option
+    tally_field_options.load_units_as_options(unit_field.field_id)
+    assert set(_stored(unit_field.field_id)) == {unit['name'] for unit in tally_units}
+
+
+def test_manual_sub_field_option_changes_force_next_sync(unit_sub_field, tally_units, client):
+    sub_field_id = unit_sub_field.sub_temp_field_id
+
+    def options_hash():
+        db.session.expire_all()
+        return db.session.get(SubTemplateField, sub_field_id).options_hash
+
+    tally_field_options.load_units_as_sub_field_options(sub_field_id)
+    assert options_hash() is not None
+
+    rv = client.post(f'/api/templates/sub-fields/{sub_field_id}/options',
+                     json={'option_value': 'DOZ', 'option_label': 'Dozen'})
+    assert rv.status_code == 201
+    assert options_hash() is None
+
+    tally_field_options.load_units_as_sub_field_options(sub_field_id)
+    assert options_hash() is not None
+
+    options = client.get(f'/api/templates/sub-fields/{sub_field_id}/options').get_json()['sub_field_options']
+    option_id = options[0]['sub_options_id']
+    rv = client.delete(f'/api/templates/sub-fields/options/{option_id}')
+    assert rv.status_code == 200
+    assert options_hash() is None
+
+    # The resync restores the deleted option
+    tally_field_options.load_units_as_sub_field_options(sub_field_id)
+    options = client.get(f'/api/templates/sub-fields/{sub_field_id}/options').get_json()['sub_field_options']
+    assert {option['option_value'] for option in options} == {unit['name'] for unit in tally_units}
+
+
+@pytest.fixture
+def tally_datasets(monkeypatch, tally_units):
+    # Batch loads fetch every data set they need through _fetch_tally_datasets
+    requested = []
+
+    def fake_fetch(sources):
+        requested.append(set(sources))
+        return {source: tally_units for source in sources}
+
+    monkeypatch.setattr(tally_field_options, '_fetch_tally_datasets', fake_fetch)
+    return requested
+
+
+def test_bulk_refresh_commits_fields_and_sub_fields_once(unit_sub_field, tally_units, tally_datasets, monkeypatch):
+    field_id, sub_field_id = unit_sub_field.field_id, unit_sub_field.sub_temp_field_id
+    commits = []
+    commit = db.session.commit
+
+    def counting_commit():
+        commits.append(True)
+        commit()
+
+    monkeypatch.setattr(db.session, 'commit', counting_commit)
+
+    results = tally_field_options.bulk_refresh([field_id], [sub_field_id])
+
+    assert len(commits) == 1
+    # The units data set serves both and is fetched once
+    assert tally_datasets == [{'units'}]
+    assert results['fields'][field_id]['success'] is True
+    assert results['sub_fields'][sub_field_id]['success'] is True
+    unit_names = {unit['name'] for unit in tally_units}
+    assert set(_stored(field_id)) == unit_names
+    assert {option.option_value for option in unit_sub_field.sub_field_options} == unit_names
+
+
+def test_bulk_refresh_reports_unknown_ids_per_id(unit_sub_field, tally_datasets):
+    field_id, sub_field_id = unit_sub_field.field_id, unit_sub_field.sub_temp_field_id
+
+    results = tally_field_options.bulk_refresh([field_id, 9999], [sub_field_id, 8888])
+
+    assert results['fields'][9999] == {'success': False, 'field_id': 9999, 'error': 'Field with ID 9999 not found'}
+    assert results['sub_fields'][8888] == {
+        'success': False, 'sub_field_id': 8888, 'error': 'Sub-field with ID 8888 not found'
+    }
+    assert results['fields'][field_id]['success'] is True
+    assert results['sub_fields'][sub_field_id]['success'] is True
+
+
+def test_bulk_refresh_wraps_lookup_errors(unit_field, monkeypatch):
+    def broken_fetch(sources):
+        raise RuntimeError('no Tally host configured')
+
+    monkeypatch.setattr(tally_field_options, '_fetch_tally_datasets', broken_fetch)
+
+    with pytest.raises(tally_field_options.TallyFieldOptionsError, match='no Tally host configured'):
+        tally_field_options.auto_load_tally_options_for_fields([unit_field.field_id])